@@ -0,0 +1,96 @@
+"""
+Vectorized dashboard analytics.
+
+Loads only the employee columns the dashboard needs in a single query and
+aggregates them with pandas/NumPy instead of walking row dicts in Python.
+pandas and NumPy are imported on first use, so importing this module for
+STATUS_OPTIONS stays cheap.
+"""
+
+# Candidate status labels, in pipeline order
+STATUS_OPTIONS = ["Offer Generated", "Offer Sent", "Offer Accepted", "Onboarding Completed"]
+
+ANALYTICS_COLUMNS = ["position", "start_date_iso", "offer_sent", "offer_accepted", "onboarding_completed"]
+
+# Days-until-start buckets: (label, upper bound in days, inclusive)
+START_DATE_BUCKETS = [
+    ("Already Started", -1),
+    ("Within 7 Days", 7),
+    ("8-14 Days", 14),
+    ("15-30 Days", 30),
+    ("Later", float("inf")),
+]
+
+
+def load_employee_frame(conn):
+    """Read the analytics columns for every employee in one query."""
+    import pandas as pd
+    
+    return pd.read_sql_query(f"SELECT {', '.join(ANALYTICS_COLUMNS)} FROM employees", conn)
+
+
+def status_codes(frame):
+    """
+    Pipeline stage of every row as an index into STATUS_OPTIONS
+
+    Args:
+        frame (pd.DataFrame): Frame with the three status flag columns
+
+    Returns:
+        np.ndarray: Integer codes 0-3
+    """
+    import numpy as np
+    
+    sent = frame["offer_sent"].fillna(0).to_numpy(dtype=bool)
+    accepted = frame["offer_accepted"].fillna(0).to_numpy(dtype=bool)
+    completed = frame["onboarding_completed"].fillna(0).to_numpy(dtype=bool)
+    return np.select([completed, accepted, sent], [3, 2, 1], default=0)
+
+
+def compute_dashboard_metrics(frame, today):
+    """
+    Aggregate everything the dashboard shows from one employee frame
+
+    Args:
+        frame (pd.DataFrame): Result of load_employee_frame
+        today (str): ISO date that start-date buckets are measured from
+
+    Returns:
+        dict: Plain tuples/ints so the result is cheap to cache:
+            counts: the five overview card values
+            status_counts: candidates per STATUS_OPTIONS stage
+            role_counts: (role, count) pairs sorted by role
+            start_buckets: (label, count) pairs for START_DATE_BUCKETS plus "Unknown"
+    """
+    import numpy as np
+    import pandas as pd
+    
+    codes = status_codes(frame)
+    status_counts = np.bincount(codes, minlength=len(STATUS_OPTIONS))
+
+    accepted = frame["offer_accepted"].fillna(0).to_numpy(dtype=bool)
+    completed = frame["onboarding_completed"].fillna(0).to_numpy(dtype=bool)
+    counts = {
+        "total_offers": int(len(frame)),
+        "offers_sent": int(frame["offer_sent"].fillna(0).to_numpy(dtype=bool).sum()),
+        "offers_accepted": int(accepted.sum()),
+        "pending_onboarding": int((accepted & ~completed).sum()),
+        "onboarding_completed": int(completed.sum()),
+    }
+
+    roles = frame["position"].fillna("Unknown").value_counts().sort_index()
+
+    start = pd.to_datetime(frame["start_date_iso"], format="%Y-%m-%d", errors="coerce")
+    days = (start - pd.Timestamp(today)).dt.days
+    edges = [float("-inf")] + [upper for _, upper in START_DATE_BUCKETS]
+    labels = [label for label, _ in START_DATE_BUCKETS]
+    bucketed = pd.cut(days, bins=edges, labels=labels, right=True).value_counts().reindex(labels, fill_value=0)
+    start_buckets = [(label, int(count)) for label, count in bucketed.items()]
+    start_buckets.append(("Unknown", int(days.isna().sum())))
+
+    return {
+        "counts": counts,
+        "status_counts": tuple(int(n) for n in status_counts),
+        "role_counts": tuple((role, int(count)) for role, count in roles.items()),
+        "start_buckets": tuple(start_buckets),
+    }
@@ -0,0 +1,65 @@
+"""
+Throwaway working directories for running the app outside `streamlit run`.
+
+The app resolves data/ and its assets against the working directory, so
+the benchmarks and tests run it from a temporary directory holding copies
+of the letter assets, with SMTP pointed away from the network.
+
+Usage:
+    from appdir import app_workdir
+
+    with app_workdir("onboard-bench-") as workdir:
+        import onboard
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+ASSETS = ["logo.png", "chanukya-sign.png"]
+
+# Nothing listens on port 1, so stray mail fails fast instead of leaving the machine
+OFFLINE_SMTP = {"SMTP_SERVER": "127.0.0.1", "SMTP_PORT": "1", "SMTP_USE_TLS": "0"}
+
+
+def copy_assets(workdir):
+    """Copy the letter assets the app expects next to data/ into workdir."""
+    for asset in ASSETS:
+        if (REPO_DIR / asset).exists():
+            shutil.copy(REPO_DIR / asset, workdir)
+
+
+def enter_app_dir(workdir):
+    """Make workdir the app's working directory and onboard importable in this process."""
+    os.chdir(workdir)
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+    logging.disable(logging.WARNING)  # Bare-mode Streamlit warnings
+
+
+@contextmanager
+def app_workdir(prefix="onboard-", **env):
+    """
+    Run the block from a fresh app directory, removed again afterwards.
+
+    Args:
+        prefix (str): Name prefix for the temporary directory
+        **env: Environment overrides, e.g. SMTP_PORT for a local mail sink
+
+    Yields:
+        Path: The working directory
+    """
+    origin = Path.cwd()
+    workdir = Path(tempfile.mkdtemp(prefix=prefix))
+    copy_assets(workdir)
+    os.environ.update(OFFLINE_SMTP, **env)
+    enter_app_dir(workdir)
+    try:
+        yield workdir
+    finally:
+        os.chdir(origin)
+        shutil.rmtree(workdir, ignore_errors=True)
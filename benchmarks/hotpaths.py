@@ -0,0 +1,228 @@
+"""
+Benchmarks for the app's hot paths at realistic data sizes.
+
+Seeds a throwaway data directory with synthetic candidates (1k, 10k and
+100k rows by default, grown in place between sizes) and times:
+
+    get_employees, save_employee (insert and update), get_documents,
+    generate_pdf_offer_letter (fresh and cached), clean_for_latin1,
+    check_human_intervention, and dashboard aggregation (trigger
+    counters and the pandas analytics pass)
+
+Results are written as JSON so runs can be compared over time, and
+--compare prints the change against an earlier result file. Nothing
+touches the network; email stays in the local outbox.
+
+Usage:
+    python benchmarks/hotpaths.py
+    python benchmarks/hotpaths.py --sizes 1000 10000 --compare benchmarks/results/previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from appdir import REPO_DIR, app_workdir
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Meera", "Kabir", "Ananya", "Rohan", "Saanvi", "Vikram", "Zoya", "José", "Zoë"]
+LAST_NAMES = ["Sharma", "Patel", "Reddy", "Iyer", "Khan", "Das", "Nair", "Gupta", "Müller", "O'Brien"]
+
+# Letter-sized text with the punctuation clean_for_latin1 has to replace
+LATIN1_SAMPLE = (
+    "We’re delighted to offer you the role — effective immediately — at “AI Planet”. "
+    "Your compensation is ₹37,500 per month… Please sign by the start date. "
+) * 20
+
+
+def timed(fn, repeat):
+    """Call fn repeat times after one unrecorded warm-up call; return per-call statistics in milliseconds."""
+    fn()  # First calls pay for lazy imports and cold caches
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "max_ms": round(max(samples), 4),
+        "calls": repeat,
+    }
+
+
+def synthetic_rows(start, count, rng, roles):
+    today = datetime.now().date()
+    for i in range(start, start + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        start_date = today + timedelta(days=rng.randint(-90, 180))
+        yield i, {
+            "name": f"{first} {last} {i}",
+            "email": f"candidate{i}@example.com",
+            "address": f"{rng.randint(1, 999)} MG Road, Hyderabad",
+            "position": rng.choice(roles),
+            "start_date": start_date.strftime("%B %d, %Y"),
+            "annual_salary": str(rng.choice([9000, 25000, 37500, 60000, 250000])),
+        }
+
+
+def seed(app, target, rng):
+    """Grow the employees table to target rows with a realistic status mix and one letter each."""
+    with app.get_connection() as conn:
+        current = conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+    if current >= target:
+        return 0
+    imported, errors = app.import_employees(synthetic_rows(current, target - current, rng, list(app.ROLES)))
+    if errors:
+        raise RuntimeError(f"Seeding rejected {len(errors)} rows, e.g. {errors[0]}")
+
+    with app.get_connection() as conn:
+        # Roughly 50% sent, 30% accepted, 10% onboarded
+        conn.execute("""
+            UPDATE employees SET
+                offer_sent = (rowid % 10) < 5,
+                offer_accepted = (rowid % 10) < 3,
+                onboarding_completed = (rowid % 10) < 1,
+                status = CASE
+                    WHEN (rowid % 10) < 1 THEN 'Onboarding Completed'
+                    WHEN (rowid % 10) < 3 THEN 'Offer Accepted'
+                    WHEN (rowid % 10) < 5 THEN 'Offer Sent'
+                    ELSE 'Offer Generated'
+                END
+            WHERE rowid > ?
+        """, (current,))
+        conn.execute("""
+            INSERT OR IGNORE INTO documents (id, name, category, role, file_path, employee_id, size_bytes, upload_date)
+            SELECT lower(hex(randomblob(16))), name, ?, position,
+                   'data/documents/' || replace(name, ' ', '_') || '_offer_letter.pdf', id, 17500, created_at
+            FROM employees WHERE rowid > ?
+        """, (app.OFFER_LETTER_CATEGORY, current))
+    return imported
+
+
+def run_size(app, clean_for_latin1, size, rng, repeat):
+    seed_start = time.perf_counter()
+    seeded = seed(app, size, rng)
+    seed_seconds = time.perf_counter() - seed_start
+
+    with app.get_connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM employees ORDER BY random() LIMIT 200")]
+    sample = app.get_employees_by_ids(ids)
+    picks = iter(sample * (repeat * 4 // len(sample) + 2))
+
+    def insert_employee():
+        employee = dict(next(picks))
+        employee["id"] = str(uuid.uuid4())
+        app.save_employee(employee)
+
+    def update_employee():
+        employee = dict(next(picks))
+        employee["offer_sent"] = not employee.get("offer_sent")
+        app.save_employee(employee)
+
+    def dashboard_analytics():
+        with app.get_connection() as conn:
+            frame = app.load_employee_frame(conn)
+        app.compute_dashboard_metrics(frame, datetime.now().date().isoformat())
+
+    def fresh_letter():
+        # Unique salary per call so the render cache never hits
+        employee = dict(next(picks))
+        employee["annual_salary"] = f"{rng.randint(10000, 99999):,}"
+        app.generate_pdf_offer_letter(employee)
+
+    cached_employee = dict(sample[0])
+    app.generate_pdf_offer_letter(dict(cached_employee))
+
+    heavy = max(1, repeat // 5)
+    results = {
+        "get_employees": timed(app.get_employees, heavy),
+        "save_employee_insert": timed(insert_employee, repeat),
+        "save_employee_update": timed(update_employee, repeat),
+        "get_documents": timed(lambda: app.get_documents(app.OFFER_LETTER_CATEGORY), heavy),
+        "dashboard_counts": timed(app.get_dashboard_counts, repeat),
+        "dashboard_analytics": timed(dashboard_analytics, heavy),
+        "check_human_intervention": timed(lambda: [app.check_human_intervention(employee) for employee in sample], repeat),
+        "clean_for_latin1": timed(lambda: clean_for_latin1(LATIN1_SAMPLE), repeat),
+        "generate_pdf_offer_letter_fresh": timed(fresh_letter, heavy),
+        "generate_pdf_offer_letter_cached": timed(lambda: app.generate_pdf_offer_letter(dict(cached_employee)), repeat),
+    }
+    results["check_human_intervention"]["batch_size"] = len(sample)
+    return {"rows": size, "seeded_rows": seeded, "seed_seconds": round(seed_seconds, 2), "benchmarks": results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(report, previous):
+    before = {entry["rows"]: entry["benchmarks"] for entry in previous.get("sizes", [])}
+    print(f"\nCompared with {previous.get('commit') or 'previous run'} ({previous.get('timestamp')}):")
+    for entry in report["sizes"]:
+        old = before.get(entry["rows"])
+        if not old:
+            continue
+        for name, result in entry["benchmarks"].items():
+            if name in old and old[name]["median_ms"]:
+                change = (result["median_ms"] / old[name]["median_ms"] - 1) * 100
+                print(f"  {entry['rows']:>7} rows  {name:<34} {old[name]['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Employee counts to benchmark, ascending")
+    parser.add_argument("--repeat", type=int, default=50, help="Calls per fast benchmark (heavy ones use a fifth)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/hotpaths-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for the synthetic data")
+    args = parser.parse_args()
+
+    with app_workdir("onboard-bench-"):
+        import onboard as app
+        from offer_letter_pdf import clean_for_latin1
+        # Page previews are not part of these measurements
+        app.get_preview_renderer().stop()
+
+        rng = random.Random(args.seed)
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "sizes": [],
+        }
+        for size in sorted(args.sizes):
+            entry = run_size(app, clean_for_latin1, size, rng, args.repeat)
+            report["sizes"].append(entry)
+            print(f"\n{size} rows (seeded {entry['seeded_rows']} in {entry['seed_seconds']}s)")
+            for name, result in entry["benchmarks"].items():
+                print(f"  {name:<34} median {result['median_ms']:>10.3f} ms   min {result['min_ms']:>10.3f} ms")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"hotpaths-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        print_comparison(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Headless multi-session load test for the onboarding app.
+
+Drives onboard.py through Streamlit's AppTest with N concurrent HR
+sessions. Every session logs in through the sidebar form and then repeats
+a workflow:
+
+    dashboard   rerun the dashboard and page through the candidate table
+    status      move one candidate to the next pipeline status
+    generate    fill in the offer letter form and generate the PDF
+    send        walk through the email confirmation and send the offer
+    return      navigate back to the dashboard
+
+AppTest installs a process-global runtime for each run, so two runs cannot
+overlap inside one process. Each session therefore runs in its own process
+(spawned, so nothing is inherited from this one), and their reruns really
+do execute at the same time. What the sessions share is what separate
+server processes or replicas share: the SQLite database, the email outbox
+and the machine's cores. The numbers show how the app's shared state holds
+up under concurrent sessions. They do not model how one `streamlit run`
+server schedules many sessions on its own interpreter, which takes a
+browser-level harness against a real server.
+
+Each step is timed from the moment the session asks for the rerun until
+the AppTest run returns. Every session renders its landing page once
+before the clock starts, so import time is not counted. The app runs
+against a temporary data directory seeded with synthetic candidates, and
+email goes to a local aiosmtpd sink, so nothing touches the network. Rerun
+latency percentiles and throughput are reported for each concurrency
+level.
+
+Usage:
+    pip install aiosmtpd
+    python benchmarks/loadtest.py --sessions 1 2 4 8 --iterations 3
+    python benchmarks/loadtest.py --sessions 4 --candidates 10000 --json loadtest.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import traceback
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_SESSIONS = [1, 2, 4, 8]
+
+# Sidebar credentials for the HR role
+HR_USERNAME = "aiplanet"
+HR_PASSWORD = "aiplanet000"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("This harness needs aiosmtpd: pip install aiosmtpd")
+
+from appdir import REPO_DIR, app_workdir, enter_app_dir
+from hotpaths import synthetic_rows
+from smtp_batch import CountingSink, free_port
+
+APP_PATH = REPO_DIR / "onboard.py"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def by_label(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r} on the page")
+
+
+class Session:
+    """One simulated HR user with its own AppTest and session state."""
+
+    def __init__(self, number, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+        self.timings = []  # (step, seconds)
+        self.errors = []
+        self.offers = 0
+
+    def step(self, name, action=None):
+        start = time.perf_counter()
+        (action() if action else self.at).run()
+        self.timings.append((name, time.perf_counter() - start))
+        if self.at.exception:
+            raise RuntimeError(f"{name}: {self.at.exception[0].message}")
+
+    def warm_up(self):
+        # First run pays for importing the app; not part of the measurement
+        self.at.run()
+        if self.at.exception:
+            raise RuntimeError(f"landing: {self.at.exception[0].message}")
+
+    def login(self):
+        by_label(self.at.text_input, "Username").input(HR_USERNAME)
+        by_label(self.at.text_input, "Password").input(HR_PASSWORD)
+        self.step("login", lambda: by_label(self.at.button, "Login").click())
+        if not self.at.session_state.authenticated:
+            raise RuntimeError("login was rejected")
+
+    def browse_dashboard(self):
+        self.step("dashboard")
+        next_buttons = [button for button in self.at.button if button.key == "candidate_next_page"]
+        if next_buttons:
+            self.step("dashboard", lambda: next_buttons[0].click())
+
+    def change_status(self):
+        from analytics import STATUS_OPTIONS
+
+        selectboxes = [box for box in self.at.selectbox if (box.key or "").startswith("status_")]
+        if not selectboxes:
+            return
+        box = selectboxes[(self.number + len(self.timings)) % len(selectboxes)]
+        new_status = STATUS_OPTIONS[(STATUS_OPTIONS.index(box.value) + 1) % len(STATUS_OPTIONS)]
+        self.step("status", lambda: box.set_value(new_status))
+
+    def generate_and_send_offer(self, iteration):
+        self.step("navigate", lambda: self.at.radio(key="nav_page").set_value("Offer Letter Generator"))
+        by_label(self.at.text_input, "Full Name").input(f"Load Test {self.number}-{iteration}")
+        by_label(self.at.text_input, "Email Address").input(f"loadtest{self.number}.{iteration}@example.com")
+        by_label(self.at.text_area, "Address").input(f"{self.number} Load Test Lane, Hyderabad")
+        self.step("generate", lambda: by_label(self.at.button, "Generate Offer Letter").click())
+
+        self.step("send", lambda: by_label(self.at.button, "Proceed to Send Email").click())
+        self.step("send", lambda: by_label(self.at.button, "Send Email").click())
+        self.step("send", lambda: by_label(self.at.button, "Send Email Now").click())
+        self.offers += 1
+        self.step("return", lambda: self.at.radio(key="nav_page").set_value("Dashboard"))
+
+    def run(self, iterations):
+        try:
+            self.login()
+            for iteration in range(iterations):
+                self.browse_dashboard()
+                self.change_status()
+                self.generate_and_send_offer(iteration)
+        except Exception as exc:
+            self.errors.append(f"session {self.number}: {exc}")
+
+
+def session_process(number, iterations, timeout, workdir, start_barrier, results):
+    """Run one session in this (spawned) process and report its timings."""
+    enter_app_dir(workdir)
+    try:
+        session = Session(number, timeout)
+        session.warm_up()
+    except Exception:
+        # Still wait for the others, or the barrier never opens
+        start_barrier.wait()
+        results.put({"timings": [], "offers": 0, "errors": [f"session {number}: {traceback.format_exc(limit=2)}"]})
+        return
+    start_barrier.wait()
+    session.run(iterations)
+    results.put({"timings": session.timings, "offers": session.offers, "errors": session.errors})
+
+
+def run_level(concurrency, iterations, timeout, workdir):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(concurrency + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=session_process, args=(number, iterations, timeout, workdir, barrier, results), daemon=True)
+        for number in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    # Drain the queue before joining, or a child blocks flushing its result
+    sessions = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    timings = [seconds for session in sessions for _, seconds in session["timings"]]
+    per_step = defaultdict(list)
+    for session in sessions:
+        for step, seconds in session["timings"]:
+            per_step[step].append(seconds)
+
+    def summarize(samples):
+        return {
+            "reruns": len(samples),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 1),
+            "p90_ms": round(percentile(samples, 0.90) * 1000, 1),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+            "mean_ms": round(statistics.mean(samples) * 1000, 1),
+        }
+
+    return {
+        "sessions": concurrency,
+        "seconds": round(elapsed, 2),
+        "reruns_per_second": round(len(timings) / elapsed, 2) if timings else 0.0,
+        "offers_per_minute": round(sum(session["offers"] for session in sessions) / elapsed * 60, 1),
+        "latency": summarize(timings) if timings else None,
+        "steps": {step: summarize(samples) for step, samples in sorted(per_step.items())},
+        "errors": [error for session in sessions for error in session["errors"]],
+    }
+
+
+def wait_for_outbox(app, timeout):
+    """Wait until the outbox worker has delivered everything queued."""
+    deadline = time.monotonic() + timeout
+    app.get_outbox_worker().wake()
+    while time.monotonic() < deadline:
+        counts = app.get_outbox_summary(limit=1)[0]
+        if not counts.get("queued") and not counts.get("sending"):
+            return counts
+        time.sleep(0.5)
+    return app.get_outbox_summary(limit=1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS, help="Concurrency levels to run")
+    parser.add_argument("--iterations", type=int, default=3, help="Workflow repetitions per session")
+    parser.add_argument("--candidates", type=int, default=1000, help="Synthetic candidates seeded before the run")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed for a single rerun")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    sink = CountingSink()
+    host, port = "127.0.0.1", free_port()
+    controller = Controller(sink, hostname=host, port=port)
+    controller.start()
+
+    results = []
+    try:
+        with app_workdir("onboard-load-", SMTP_SERVER=host, SMTP_PORT=str(port), SENDER_PASSWORD="") as workdir:
+            import random
+            import onboard as app
+
+            imported, errors = app.import_employees(synthetic_rows(0, args.candidates, random.Random(1234), list(app.ROLES)))
+            if errors:
+                sys.exit(f"Seeding rejected {len(errors)} rows, e.g. {errors[0]}")
+            print(f"Seeded {imported} candidates in {workdir}")
+
+            print(f"{'sessions':>8} {'reruns/s':>9} {'offers/min':>11} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}  errors")
+            for concurrency in args.sessions:
+                result = run_level(concurrency, args.iterations, args.timeout, str(workdir))
+                results.append(result)
+                latency = result["latency"] or dict.fromkeys(["p50_ms", "p90_ms", "p99_ms", "max_ms"], 0)
+                print(
+                    f"{concurrency:>8} {result['reruns_per_second']:>9.2f} {result['offers_per_minute']:>11.1f} "
+                    f"{latency['p50_ms']:>8.1f} {latency['p90_ms']:>8.1f} {latency['p99_ms']:>8.1f} {latency['max_ms']:>8.1f}  {len(result['errors'])}"
+                )
+                for error in result["errors"][:3]:
+                    print(f"           {error}")
+
+            outbox = wait_for_outbox(app, timeout=60)
+            print(f"\nOutbox: {dict(outbox)}; sink received {sink.received} messages")
+    finally:
+        controller.stop()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "candidates": args.candidates,
+            "iterations": args.iterations,
+            "levels": results,
+            "emails_received": sink.received,
+        }, indent=2))
+
+    if any(result["errors"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Offline SMTP throughput harness.
+
+Starts a local aiosmtpd sink and sends the same batch of offer-letter
+sized messages two ways: a fresh connection per message (the original
+send path) and one pooled session per batch via SMTPSessionPool.
+
+Usage:
+    pip install aiosmtpd
+    python benchmarks/smtp_batch.py --messages 500 --batch-size 50
+"""
+import argparse
+import os
+import sys
+import smtplib
+import socket
+import threading
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smtp_pool import SMTPSessionPool
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("This harness needs aiosmtpd: pip install aiosmtpd")
+
+
+class CountingSink:
+    """aiosmtpd handler that accepts and counts every message."""
+
+    def __init__(self):
+        self.received = 0
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self.received += 1
+        return "250 Message accepted for delivery"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_messages(count, attachment_size):
+    attachment = os.urandom(attachment_size)
+    messages = []
+    for i in range(count):
+        msg = MIMEMultipart()
+        msg["From"] = "hr@aiplanet.com"
+        msg["To"] = f"candidate{i}@example.com"
+        msg["Subject"] = f"Job Offer {i}"
+        msg.attach(MIMEText("Please find your offer letter attached.", "plain"))
+        part = MIMEApplication(attachment, _subtype="pdf")
+        part.add_header("Content-Disposition", "attachment", filename="offer_letter.pdf")
+        msg.attach(part)
+        messages.append(msg)
+    return messages
+
+
+def send_one_connection_each(host, port, messages):
+    for msg in messages:
+        with smtplib.SMTP(host, port) as server:
+            server.send_message(msg)
+    return len(messages)
+
+
+def send_pooled(host, port, messages, batch_size):
+    pool = SMTPSessionPool(host, port, use_tls=False)
+    try:
+        for start in range(0, len(messages), batch_size):
+            errors = [e for e in pool.send_batch(messages[start:start + batch_size]) if e]
+            if errors:
+                raise errors[0]
+    finally:
+        pool.close()
+    return pool.stats["connects"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--attachment-kb", type=int, default=18, help="Size of the fake PDF attachment")
+    args = parser.parse_args()
+
+    sink = CountingSink()
+    host, port = "127.0.0.1", free_port()
+    controller = Controller(sink, hostname=host, port=port)
+    controller.start()
+    try:
+        messages = build_messages(args.messages, args.attachment_kb * 1024)
+
+        start = time.perf_counter()
+        connects = send_one_connection_each(host, port, messages)
+        per_message = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pooled_connects = send_pooled(host, port, messages, args.batch_size)
+        pooled = time.perf_counter() - start
+    finally:
+        controller.stop()
+
+    print(f"Messages per run:        {args.messages} ({args.attachment_kb} KB attachment)")
+    print(f"Connection per message:  {per_message:.2f}s  {args.messages / per_message:8.1f} msg/s  {connects} connects")
+    print(f"Pooled batches of {args.batch_size:<4}:  {pooled:.2f}s  {args.messages / pooled:8.1f} msg/s  {pooled_connects} connects")
+    print(f"Sink received {sink.received} of {2 * args.messages} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Cold-start benchmark for the onboarding app.
+
+Every measurement runs in a fresh interpreter against an empty data
+directory, the way an autoscaled container starts:
+
+    import    importing onboard.py (module-level setup, no page rendered)
+    landing   first complete render of the login page
+    settings  first complete render of the Settings page for an HR user
+    history   the same Settings render for a session that has already sent
+              notifications, so its history table has rows to show
+
+The landing and settings renders must also leave LAZY_MODULES unimported.
+The script exits non-zero when a median is over budget or a lazy module
+was loaded, so it can gate CI.
+
+Usage:
+    python benchmarks/startup.py --repeat 5
+    python benchmarks/startup.py --budget-import 0.5 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from appdir import OFFLINE_SMTP, REPO_DIR, copy_assets
+
+APP_PATH = REPO_DIR / "onboard.py"
+
+# Dependencies that only specific pages or actions need
+LAZY_MODULES = [
+    "pandas",
+    "numpy",
+    "matplotlib",
+    "fpdf",
+    "pyarrow",
+    "pypdfium2",
+    "smtplib",
+    "email.mime.multipart",
+    "http.server",
+    "concurrent.futures.process",
+]
+
+# Median seconds allowed per scenario
+DEFAULT_BUDGETS = {"import": 0.75, "landing": 1.5, "settings": 1.5, "history": 1.5}
+
+# Runs in the child interpreter; the clock starts before Streamlit is imported
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+scenario, app_path, lazy_modules = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+if scenario == "import":
+    sys.path.insert(0, str(__import__("pathlib").Path(app_path).parent))
+    import onboard
+else:
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(app_path, default_timeout=120)
+    if scenario in ("settings", "history"):
+        at.session_state.authenticated = True
+        at.session_state.user_role = "HR"
+        at.session_state.nav_page = "Settings"
+    if scenario == "history":
+        from collections import deque
+        at.session_state.notification_history = deque([
+            {"timestamp": f"2026-01-01 09:{i:02d}:00", "recipient": "hr@example.com",
+             "subject": f"Offer Letter Queued for Candidate {i}", "priority": "normal", "id": i}
+            for i in range(20)
+        ], maxlen=20)
+    at.run()
+    if at.exception:
+        sys.exit(at.exception[0].message)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [name for name in lazy_modules if name in sys.modules]}))
+"""
+
+
+def run_probe(scenario, workdir):
+    env = dict(os.environ, **OFFLINE_SMTP)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, scenario, str(APP_PATH), json.dumps(LAZY_MODULES)],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{scenario} probe failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(scenario, repeat):
+    samples, loaded = [], set()
+    # One unrecorded run warms the bytecode cache, as a built image would have
+    for i in range(repeat + 1):
+        with tempfile.TemporaryDirectory(prefix="onboard-startup-") as workdir:
+            copy_assets(workdir)
+            probe = run_probe(scenario, workdir)
+        if i:
+            samples.append(probe["seconds"])
+            loaded.update(probe["loaded"])
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples), "samples": samples, "lazy_modules_loaded": sorted(loaded)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per scenario")
+    for scenario, budget in DEFAULT_BUDGETS.items():
+        parser.add_argument(f"--budget-{scenario}", type=float, default=budget, help=f"Median seconds allowed (default {budget})")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for scenario in DEFAULT_BUDGETS:
+        budget = getattr(args, f"budget_{scenario}")
+        result = measure(scenario, args.repeat)
+        result["budget"] = budget
+        results[scenario] = result
+
+        status = "ok"
+        if result["median"] > budget:
+            status = "OVER BUDGET"
+            failures.append(f"{scenario}: median {result['median']:.3f}s > budget {budget:.3f}s")
+        if result["lazy_modules_loaded"]:
+            status = "EAGER IMPORTS"
+            failures.append(f"{scenario}: loaded {', '.join(result['lazy_modules_loaded'])}")
+        print(f"{scenario:<9} median {result['median']:.3f}s  (min {result['min']:.3f}s, max {result['max']:.3f}s)  budget {budget:.2f}s  {status}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=2))
+
+    if failures:
+        print("\n".join(["", "Startup budget exceeded:"] + failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Page-image previews for stored offer letters.
+
+Each page of a letter is rasterised once to a small WebP image saved next
+to the PDF (``<name>.page1.webp``, ``<name>.page2.webp``, ...), so the app
+can show a preview for a few KB instead of shipping the whole document.
+Rendering happens on a background thread; readers only ever see finished
+files. A letter that cannot be rendered gets a ``<name>.preview-failed``
+marker instead, so it is not queued again until the PDF is rewritten.
+"""
+import logging
+import os
+import queue
+import threading
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WIDTH = 240
+PREVIEW_QUALITY = 60
+PREVIEW_SUFFIX = ".webp"
+FAILED_SUFFIX = ".preview-failed"
+
+
+def preview_path(pdf_path, page_number):
+    """Where the preview of one page (1-based) of a letter is stored."""
+    pdf_path = Path(pdf_path)
+    return pdf_path.with_name(f"{pdf_path.stem}.page{page_number}{PREVIEW_SUFFIX}")
+
+
+def failed_marker(pdf_path):
+    """Where a failed render of a letter is recorded."""
+    pdf_path = Path(pdf_path)
+    return pdf_path.with_name(f"{pdf_path.stem}{FAILED_SUFFIX}")
+
+
+def preview_failed(pdf_path):
+    """
+    Whether rendering the current version of a letter already failed
+
+    A marker older than the PDF belongs to an earlier version of the letter
+    and is ignored, like a stale preview.
+    """
+    try:
+        return failed_marker(pdf_path).stat().st_mtime_ns >= Path(pdf_path).stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def existing_previews(pdf_path):
+    """
+    Previews of a letter that are at least as new as the PDF itself
+
+    Args:
+        pdf_path (str or Path): Stored offer letter
+
+    Returns:
+        list: Preview paths in page order, or an empty list if they are missing or stale
+    """
+    pdf_path = Path(pdf_path)
+    try:
+        pdf_mtime = pdf_path.stat().st_mtime_ns
+    except OSError:
+        return []
+    previews = []
+    page_number = 1
+    while True:
+        path = preview_path(pdf_path, page_number)
+        try:
+            if path.stat().st_mtime_ns < pdf_mtime:
+                return []
+        except OSError:
+            break
+        previews.append(path)
+        page_number += 1
+    return previews
+
+
+def render_previews(pdf_path, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY):
+    """
+    Rasterise every page of a letter to WebP unless up-to-date previews exist
+
+    Args:
+        pdf_path (str or Path): Stored offer letter
+        width (int): Preview width in pixels; height follows the page aspect ratio
+        quality (int): WebP quality (0-100)
+
+    Returns:
+        list: Preview paths in page order
+    """
+    import pypdfium2 as pdfium  # Only needed where previews are rendered
+
+    pdf_path = Path(pdf_path)
+    previews = existing_previews(pdf_path)
+    if previews:
+        return previews
+
+    document = pdfium.PdfDocument(str(pdf_path))
+    try:
+        for index in range(len(document)):
+            page = document[index]
+            page_width, _ = page.get_size()
+            image = page.render(scale=width / page_width).to_pil()
+            target = preview_path(pdf_path, index + 1)
+            # Write atomically so readers never see a partial image
+            tmp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+            image.save(tmp_path, format="WEBP", quality=quality, method=6)
+            os.replace(tmp_path, target)
+            previews.append(target)
+            page.close()
+    finally:
+        document.close()
+
+    # Drop previews of pages the letter no longer has
+    extra = len(previews) + 1
+    while preview_path(pdf_path, extra).exists():
+        preview_path(pdf_path, extra).unlink(missing_ok=True)
+        extra += 1
+    failed_marker(pdf_path).unlink(missing_ok=True)
+    return previews
+
+
+class PreviewRenderer:
+    """
+    Background thread that renders previews for queued letters.
+
+    Submitting a letter that is already waiting is a no-op, so regenerating
+    the same file repeatedly renders it once. A letter that fails to render
+    is marked (see preview_failed) rather than retried. PDFium is not
+    thread-safe, so a single worker renders everything.
+    """
+
+    def __init__(self, render=render_previews):
+        self.render = render
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="preview-renderer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, pdf_path):
+        pdf_path = str(pdf_path)
+        with self._lock:
+            if pdf_path in self._pending:
+                return
+            self._pending.add(pdf_path)
+        self._queue.put(pdf_path)
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            pdf_path = self._queue.get()
+            if pdf_path is None:
+                return
+            with self._lock:
+                self._pending.discard(pdf_path)
+            try:
+                self.render(pdf_path)
+            except Exception as exc:
+                logger.exception("Could not render previews for %s", pdf_path)
+                try:
+                    failed_marker(pdf_path).write_text(f"{type(exc).__name__}: {exc}\n", encoding="utf-8")
+                except OSError:
+                    logger.warning("Could not record the failed render of %s", pdf_path)
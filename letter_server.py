@@ -0,0 +1,223 @@
+"""
+Signed-URL file server for stored offer letters and exports.
+
+Browsers load letters straight from this server instead of receiving them
+base64-encoded over the Streamlit websocket. URLs are HMAC-signed and
+expire, responses carry validators and cache headers, and Range requests
+let the PDF viewer fetch only the bytes it needs. Files are streamed from
+disk in chunks, so large export archives never have to fit in memory.
+"""
+import email.utils
+import hashlib
+import hmac
+import mimetypes
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+# Signed URLs stay valid for at least this long
+LETTER_URL_TTL = 3600
+# Browsers may reuse a fetched letter for this long without revalidating
+LETTER_CACHE_MAX_AGE = 3600
+LETTER_CHUNK_SIZE = 64 * 1024
+# Content types browsers should display rather than download
+INLINE_CONTENT_TYPES = {"application/pdf", "image/png", "image/webp"}
+
+
+def parse_byte_range(header, size):
+    """
+    Parse a single-range ``Range`` header
+
+    Args:
+        header (str): Header value, e.g. ``bytes=0-1023`` or ``bytes=-500``
+        size (int): Size of the file in bytes
+
+    Returns:
+        tuple: Inclusive (start, end), or None to ignore the header and send the whole file
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        # Other units and multipart ranges are optional; answer with the full file
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+class LetterServer:
+    """
+    Background HTTP server for files directly under a few named directories.
+
+    ``roots`` maps a URL prefix to a directory, e.g. ``{"letters": DOCUMENTS_DIR}``
+    serves ``DOCUMENTS_DIR/x.pdf`` at ``/letters/x.pdf``. ``url_for`` returns a
+    signed link that ``resolve`` accepts until it expires. Expiry is rounded
+    to the TTL, so repeated calls within the same window return the same URL
+    and embedded viewers are not reloaded on every Streamlit rerun.
+    """
+
+    def __init__(self, roots, host="127.0.0.1", port=0, public_url=None, secret=None, ttl=LETTER_URL_TTL):
+        self.roots = {route: Path(directory).resolve() for route, directory in roots.items()}
+        self.secret = secret or os.urandom(32)
+        self.ttl = ttl
+        self._httpd = ThreadingHTTPServer((host, port), _LetterRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.letters = self
+        self.port = self._httpd.server_address[1]
+        if not public_url:
+            public_url = f"http://{'localhost' if host in ('', '0.0.0.0') else host}:{self.port}"
+        self.public_url = public_url.rstrip("/")
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="letter-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._httpd.server_close()
+
+    def _sign(self, route, name, expires):
+        return hmac.new(self.secret, f"{route}/{name}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def url_for(self, file_path):
+        """
+        Signed URL for a stored file
+
+        Args:
+            file_path (str or Path): File directly under one of the served directories
+
+        Returns:
+            str: Absolute URL; the ``v`` parameter changes whenever the file does
+
+        Raises:
+            ValueError: If the file is not in a served directory
+        """
+        path = Path(file_path).resolve()
+        route = next((route for route, root in self.roots.items() if path.parent == root), None)
+        if route is None:
+            raise ValueError(f"{path} is not in a served directory")
+        stat = path.stat()
+        expires = (int(time.time()) // self.ttl + 2) * self.ttl
+        signature = self._sign(route, path.name, expires)
+        return f"{self.public_url}/{route}/{quote(path.name)}?v={stat.st_mtime_ns}&e={expires}&s={signature}"
+
+    def resolve(self, route, name, expires, signature):
+        """Return the file a request may read, or None if the link is invalid, expired or escapes its root."""
+        root = self.roots.get(route)
+        if root is None or not expires.isdigit() or int(expires) < time.time():
+            return None
+        if not hmac.compare_digest(signature, self._sign(route, name, int(expires))):
+            return None
+        path = (root / name).resolve()
+        if path.parent != root or not path.is_file():
+            return None
+        return path
+
+
+class _LetterRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep request logs out of the Streamlit console
+        pass
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        parts = urlsplit(self.path)
+        route, _, name = parts.path.lstrip("/").partition("/")
+        query = parse_qs(parts.query)
+        path = self.server.letters.resolve(
+            route,
+            unquote(name),
+            query.get("e", [""])[0],
+            query.get("s", [""])[0],
+        )
+        if path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        stat = path.stat()
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        validators = {
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": f"private, max-age={LETTER_CACHE_MAX_AGE}",
+        }
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name, value in validators.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        status = HTTPStatus.OK
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        # If-Range: only honour the range when the client's copy is still current
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            try:
+                byte_range = parse_byte_range(range_header, size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range is not None:
+                status = HTTPStatus.PARTIAL_CONTENT
+                start, end = byte_range
+
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        disposition = "inline" if content_type in INLINE_CONTENT_TYPES else "attachment"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Disposition", f"{disposition}; filename*=utf-8''{quote(path.name)}")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        for name, value in validators.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if send_body:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(LETTER_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
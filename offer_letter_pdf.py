@@ -0,0 +1,276 @@
+"""
+Offer letter PDF rendering.
+
+Kept free of Streamlit so the renderer can run in worker processes for
+bulk generation as well as on the script thread. fpdf is imported only
+when a letter is actually laid out.
+"""
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+
+# Bump whenever the letter layout or wording changes so cached renders are invalidated
+TEMPLATE_VERSION = "1"
+
+# Candidate fields that appear in the letter
+LETTER_FIELDS = ("name", "address", "email", "position", "start_date", "annual_salary")
+
+# Image assets embedded in the letter
+LETTER_ASSETS = ("logo.png", "chanukya-sign.png")
+
+# Helper function to replace non-latin1 characters
+def clean_for_latin1(text):
+    # Replace problematic characters
+    replacements = {
+        '\u2013': '-',  # en-dash
+        '\u2014': '-',  # em-dash
+        '\u2018': "'",  # left single quote
+        '\u2019': "'",  # right single quote
+        '\u201c': '"',  # left double quote
+        '\u201d': '"',  # right double quote
+        '\u2022': '*',  # bullet
+        '\u2026': '...',  # ellipsis
+        '\u00a0': ' ',  # non-breaking space
+    }
+    
+    for char, replacement in replacements.items():
+        text = text.replace(char, replacement)
+    
+    # For any other characters not in latin-1, replace with closest ASCII equivalent or remove
+    return text.encode('latin-1', errors='replace').decode('latin-1')
+
+# PDF rendering based on the attached PDF template
+def build_offer_letter(candidate_data, company_info):
+    """
+    Lay out the three-page offer letter for a candidate
+    
+    Args:
+        candidate_data (dict): Employee data used in the letter
+        company_info (dict): Company details for the footer
+        
+    Returns:
+        FPDF: The rendered document, ready for output
+    """
+    from fpdf import FPDF
+    
+    # Create a PDF object
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    
+    # Set the font and colors
+    pdf.set_font('Arial', '', 12)
+    pdf.set_text_color(0, 0, 0)
+
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Offer Letter with AI Planet', 0, 1, 'C')
+    # Add logo at the top right corner on first page - using provided logo
+    pdf.image('logo.png', x=160, y=10, w=30) if os.path.exists('logo.png') else None
+    
+    # Add date
+    pdf.set_font('Arial', '', 12)
+    today = datetime.now().strftime("%d %B %Y")
+    pdf.cell(0, 10, f'Date: {today}', 0, 1, 'L')
+    
+    # Add candidate name and address
+    pdf.ln(10)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.set_text_color(0, 0, 150)  # Blue color
+    pdf.cell(0, 10, clean_for_latin1(candidate_data["name"]), 0, 1, 'L')
+    
+    pdf.set_font('Arial', '', 12)
+    pdf.set_text_color(0, 0, 0)  # Black color
+    pdf.cell(0, 10, f'Address: {candidate_data["address"]}', 0, 1, 'L')
+    pdf.cell(0, 10, f'Email: {candidate_data["email"]}', 0, 1, 'L', )
+    
+    # Letter content
+    pdf.ln(10)
+    pdf.cell(0, 10, f'Dear {clean_for_latin1(candidate_data["name"])},', 0, 1, 'L')
+    
+    pdf.ln(5)
+    pdf.set_font('Arial', '', 12)
+    #content = f'I am delighted & excited to welcome you to AI Planet as a {clean_for_latin1(candidate_data["position"])}. At AI Planet, we believe that our team is our biggest strength and we are looking forward to strengthening it further with your addition. We are confident that you would play a significant role in the overall success of the community that we envision to build and wish you the most enjoyable, learning packed and truly meaningful experience with AI Planet.'
+    #pdf.multi_cell(0, 6, clean_for_latin1(content))
+    pdf.set_font('Arial', '', 12); pdf.write(6, clean_for_latin1('I am delighted & excited to welcome you to AI Planet as a ')); pdf.set_font('Arial', 'B', 12); pdf.write(6, clean_for_latin1(candidate_data["position"])); pdf.set_font('Arial', '', 12); pdf.write(6, clean_for_latin1('. At AI Planet, we believe that our team is our biggest strength and we are looking forward to strengthening it further with your addition. We are confident that you would play a significant role in the overall success of the community that we envision to build and wish you the most enjoyable, learning packed and truly meaningful experience with AI Planet.'))
+    pdf.ln(10)
+    pdf.write(6, 'Your appointment will be governed by the terms and conditions presented in ');  pdf.set_font('Arial', 'B', 12) ;pdf.write(6, 'Annexure A.') ;pdf.set_font('Arial', '', 12); 
+    
+    pdf.ln(10)
+    pdf.multi_cell(0, 6, 'We look forward to you joining us. Please do not hesitate to call us for any information you may need. Also, please sign the duplicate of this offer as your acceptance and forward the same to us.')
+    
+    pdf.ln(10)
+    pdf.cell(0, 10, 'Congratulations!', 0, 1, 'L')
+    
+    pdf.image('chanukya-sign.png') if os.path.exists('chanukya-sign.png') else None
+    pdf.cell(0, 10, 'Chanukya Patnaik', 0, 1, 'L')
+    pdf.cell(0, 6, 'Founder, AI Planet (DPhi)', 0, 1, 'L')
+    
+    # Company footer
+    pdf.ln(40)
+    pdf.set_font('Arial', '', 11)
+    pdf.multi_cell(0, 5, clean_for_latin1(f'{company_info["legal_name"]} | {company_info["address"]}'))
+    
+    # Annexure A - Page 2
+    pdf.add_page()
+
+    #pdf.set_font('Arial', 'Offer letter with AI Planet', 12)
+    # Add logo at the top right corner on second page
+    pdf.image('logo.png', x=160, y=10, w=30) if os.path.exists('logo.png') else None
+    
+    pdf.set_font('Arial', 'B', 14)
+    pdf.set_text_color(0, 0, 150)  # Blue colordata\logo.png
+    pdf.cell(0, 15, 'Annexure A', 0, 1, 'L')
+    
+    pdf.set_font('Arial', '', 12)
+    pdf.set_text_color(0, 0, 0)  # Black color
+    pdf.multi_cell(0, 6, 'You shall be governed by the following terms and conditions of service during your engagement with AI Planet, and those may be amended from time to time.')
+    
+    pdf.ln(5)
+    # Numbered points - clean each point for latin1 encoding
+    points = [
+        f'You will be working with AI Planet as a {clean_for_latin1(candidate_data["position"])}. You would be responsible for aspects related to conducting market research to identify trends and AI use cases, support the sales team by qualifying leads, preparing tailored presentations, and building strong customer relationships. Additionally, you will be playing an important role in realizing the design, planning, development, and deployment platforms/solutions. Further, it may also require you to do various roles and go that extra mile in the best interest of the product.',
+        f'Your date of joining is {clean_for_latin1(candidate_data["start_date"])}. During your employment, we expected to devote your time and efforts solely to AI Planet work. You are also required to let your mentor know about forthcoming events (if there are any) in advance so that your work can be planned accordingly.',
+        f'You will be working onsite in our Hyderabad office on all working days. There will be catch ups scheduled with your mentor to discuss work progress and overall work experience at regular intervals.',
+        f'All the work that you will produce at or in relation to AI Planet will be the intellectual property of AI Planet. You are not allowed to store, copy, sell, share, and distribute it to a third party under any circumstances. Similarly, you are expected to refrain from talking about your work in public domains (both online such as blogging, social networking sites and offline among your friends, college etc.) without prior discussion and approval with your mentor.',
+        f'We take data privacy and security very seriously and to maintain confidentiality of any students, customers, clients, and companies\' data and contact details that you may get access to during your engagement will be your responsibility. AI Planet operates on zero tolerance principle with regards to any breach of data security guidelines. At the completion of the engagement, you are expected to hand over all AI Planet work/data stored on your Personal Computer to your mentor and delete the same from your machine.',
+        f'Under normal circumstances either the company or you may terminate this association by providing a notice of 30 days without assigning any reason. However, the company may terminate this agreement forthwith under situations of in-disciplinary behaviors.',
+        f'During the appointment period you shall not engage yourselves directly or indirectly or in any capacity in any other organization (other than your college).'
+        f'You are expected to conduct yourself with utmost professionalism in dealing with your mentor, team members, colleagues, clients and customers and treat everyone with due respect.',
+        
+    ]
+    
+    # Process each point to ensure it's clean for latin1 encoding
+    points = [clean_for_latin1(point) for point in points]
+    # Process each point to ensure it's clean for latin1 encoding and properly format bold text
+    pdf.ln(5)
+    for i, point in enumerate(points, 1):
+        if i > 7:  # Add remaining points to page 3
+            break
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(8, 6, f'{i}.', 0, 0)
+        pdf.set_font('Arial', '', 12)
+        x = pdf.get_x()
+        y = pdf.get_y()
+        pdf.multi_cell(180, 6, point)
+        pdf.ln(5)
+    
+    # Company footer
+    pdf.ln(10)
+    pdf.set_font('Arial', '', 11)
+    pdf.multi_cell(0, 5, clean_for_latin1(f'{company_info["legal_name"]} | {company_info["address"]}'))
+    
+    # Page 3 with remaining points
+    pdf.add_page()
+    
+    
+    # Add logo at the top right corner on third page
+    pdf.image('logo.png', x=160, y=10, w=30) if os.path.exists('logo.png') else None
+    pdf.ln(15)
+    # Continue with remaining points
+    for i, point in enumerate(points[8:], 8):
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(8, 6, f'{i}.', 12, 12)
+        pdf.set_font('Arial', '', 12)
+        x = pdf.get_x()
+        y = pdf.get_y()
+        pdf.multi_cell(180, 6, point)
+        pdf.ln(5)
+    
+    # Additional points
+    extra_points = [
+        f'AI Planet is a start-up and we love people who like to go beyond the normal call of duty and can think out of the box. Surprise us with your passion, intelligence, creativity, and hard work – and expect appreciation & rewards to follow.',
+        f'Expect constant and continuous objective feedback from your mentor and other team members and we encourage you to ask for and provide feedback at every possible opportunity. It is your right to receive and give feedback – this is the ONLY way we all can continuously push ourselves to do better.',
+        f'Have fun at what you do and do the right thing – both the principles are core of what AI Planet stands for and we expect you to imbibe them in your day to day actions and continuously challenge us if we are falling short of expectations on either of them.',
+        f'You will be provided INR {clean_for_latin1(candidate_data["annual_salary"])} /- per month as a salary. Post three months you will be considered for ESOPs. ESOPs are based on a four-year vesting schedule with a one-year cliff.'
+    ]
+    
+    # Process each extra point to ensure it's clean for latin1 encoding
+    extra_points = [clean_for_latin1(point) for point in extra_points]
+    
+    for i, point in enumerate(extra_points, len(points) + 1):
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(8, 6, f'{i}.', 0, 0)
+        pdf.set_font('Arial', '', 12)
+        x = pdf.get_x()
+        y = pdf.get_y()
+        pdf.multi_cell(180, 6, point)
+        pdf.ln(5)
+    
+    # Signature section
+    pdf.ln(5)
+    pdf.set_font('Arial', '', 12)
+    pdf.multi_cell(0, 6, 'I have negotiated, agreed, read and understood all the terms and conditions of this engagement letter as well as Annexure hereto and affix my signature in complete acceptance of the terms of the letter.')
+    
+    pdf.ln(10)
+    pdf.cell(50, 10, 'Date: ________________', 0, 0, 'L')
+    pdf.cell(0, 10, 'Signature: ________________', 0, 1, 'L')
+    
+    pdf.ln(5)
+    pdf.cell(50, 10, 'Place: ________________', 0, 0, 'L')
+    pdf.cell(0, 10, 'Name: ________________', 0, 1, 'L')
+    
+    # Company footer
+    pdf.ln(90)
+    pdf.set_font('Arial', '', 11)
+    pdf.multi_cell(0, 5, clean_for_latin1(f'{company_info["legal_name"]} | {company_info["address"]}'))
+    return pdf
+
+def offer_letter_fingerprint(candidate_data, company_info):
+    """
+    Content hash of everything that determines a rendered letter
+    
+    Covers the candidate fields used in the letter, the company details,
+    the template version, the embedded assets and the letter date.
+    
+    Returns:
+        str: Hex digest usable as a cache key
+    """
+    assets = []
+    for asset in LETTER_ASSETS:
+        try:
+            stat = os.stat(asset)
+            assets.append([asset, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            assets.append([asset, None, None])
+    payload = {
+        "fields": {field: candidate_data.get(field) for field in LETTER_FIELDS},
+        "company": company_info,
+        "template": TEMPLATE_VERSION,
+        "assets": assets,
+        "date": datetime.now().strftime("%d %B %Y"),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def offer_letter_name_part(name):
+    """Candidate name as it appears at the start of offer letter file names."""
+    return re.sub(r'[^\w\s-]', '', name or "").strip().replace(' ', '_')
+
+def offer_letter_filename(candidate_data):
+    """File name used for a candidate's offer letter generated today."""
+    sanitized_name = offer_letter_name_part(candidate_data["name"])
+    today_str = datetime.now().strftime("%Y%m%d")
+    return f"{sanitized_name}_{today_str}_offer_letter.pdf"
+
+def render_offer_letter(candidate_data, company_info):
+    """
+    Render an offer letter once and return the PDF as raw bytes
+    
+    Returns:
+        bytes: The complete PDF document
+    """
+    output = build_offer_letter(candidate_data, company_info).output(dest='S')
+    # FPDF 1.x returns a latin-1 str, fpdf2 returns a bytearray
+    return output.encode('latin-1') if isinstance(output, str) else bytes(output)
+
+def write_offer_letter(candidate_data, company_info, file_path):
+    """
+    Render an offer letter straight to disk; the unit of work for the bulk process pool
+    
+    Returns:
+        str: The path written
+    """
+    with open(file_path, "wb") as f:
+        f.write(render_offer_letter(candidate_data, company_info))
+    return str(file_path)
@@ -1,9 +1,4 @@
 import streamlit as st
-import pandas as pd
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
 from datetime import datetime, timedelta
 import os
 import json
@@ -11,12 +6,25 @@ import uuid
 import re
 from pathlib import Path
 import sqlite3
-import base64
+import csv
+import io
+import zipfile
+import threading
+import queue
+import time
+from collections import OrderedDict, deque, namedtuple
+import atexit
+import sys
+from contextlib import contextmanager
+import functools
 from io import BytesIO
-from fpdf import FPDF
-import matplotlib.pyplot as plt
-import numpy as np
-import requests  # Added for alternative email API option
+from letter_previews import PreviewRenderer, existing_previews, preview_failed
+from analytics import STATUS_OPTIONS, compute_dashboard_metrics, load_employee_frame
+from perf_trace import HISTOGRAM, RERUN_SPAN, TRACING_ENABLED, rerun_trace, span, to_jsonl, traced
+from offer_letter_pdf import LETTER_ASSETS, offer_letter_filename, offer_letter_fingerprint, offer_letter_name_part, render_offer_letter, write_offer_letter
+# Heavy dependencies (pandas, matplotlib, fpdf, email/SMTP, the letter server
+# and process pool) are imported inside the functions that use them, so pages
+# that never touch them don't pay for the import on a cold start
 
 # Set page configuration
 st.set_page_config(
@@ -31,18 +39,159 @@ DATA_DIR = Path("data")
 TEMPLATES_DIR = DATA_DIR / "templates"
 EMPLOYEES_DIR = DATA_DIR / "employees"
 DOCUMENTS_DIR = DATA_DIR / "documents"
-
-# Create directories if they don't exist
-for directory in [DATA_DIR, TEMPLATES_DIR, EMPLOYEES_DIR, DOCUMENTS_DIR]:
-    directory.mkdir(exist_ok=True, parents=True)
+CACHE_DIR = DATA_DIR / "cache"
+EXPORTS_DIR = DATA_DIR / "exports"
+DATA_DIRECTORIES = [DATA_DIR, TEMPLATES_DIR, EMPLOYEES_DIR, DOCUMENTS_DIR, CACHE_DIR, EXPORTS_DIR]
 
 # Initialize SQLite database
 DB_PATH = DATA_DIR / "aiplanet.db"
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+# Notification history limits: rows kept in SQLite, and recent items kept per session
+NOTIFICATION_HISTORY_LIMIT = 10000
+NOTIFICATION_RECENT_LIMIT = 20
+
+# SQLite connection settings shared by every DB helper
+DB_BUSY_TIMEOUT_MS = 30000
+DB_POOL_SIZE = 8
+# documents.category for generated offer letters
+OFFER_LETTER_CATEGORY = "offer_letter"
+OFFER_LETTER_PAGE_SIZE = 20
+# Display widths for the rendered page previews
+PREVIEW_DISPLAY_WIDTH = 180
+GALLERY_THUMBNAIL_WIDTH = 60
+# Reruns whose timing traces are kept per session for the Performance tab
+PERF_TRACE_RERUNS = 50
+
+class ConnectionPool:
+    """
+    Process-wide pool of SQLite connections.
+
+    Connections are opened once, switched to WAL journaling so readers never
+    block the writer, and handed out to Streamlit's script threads through
+    a thread-safe queue. Use ``with pool.connection() as conn:``; the block
+    commits on success and rolls back on error.
+    """
+
+    def __init__(self, db_path, max_idle=DB_POOL_SIZE):
+        self.db_path = str(db_path)
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._lock = threading.Lock()
+        self._all = []
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous = NORMAL")  # Durable enough under WAL
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -16000")  # ~16 MB page cache
+        conn.execute("PRAGMA foreign_keys = ON")
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def _release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            with self._lock:
+                self._all.remove(conn)
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self):
+        with self._lock:
+            connections, self._all = self._all, []
+        for conn in connections:
+            conn.close()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+@st.cache_resource
+def get_db_pool():
+    """Return the connection pool, created once per server process."""
+    pool = ConnectionPool(DB_PATH)
+    atexit.register(pool.close)
+    return pool
+
+def get_connection():
+    """Borrow a pooled connection: ``with get_connection() as conn: ...``"""
+    return get_db_pool().connection()
+
+def employee_status(employee):
+    """Derive the pipeline status label from an employee's status flags."""
+    if employee.get('onboarding_completed', False):
+        return "Onboarding Completed"
+    elif employee.get('offer_accepted', False):
+        return "Offer Accepted"
+    elif employee.get('offer_sent', False):
+        return "Offer Sent"
+    return "Offer Generated"
+
+def parse_start_date(value):
+    """Convert a "%B %d, %Y" (or already ISO) start date to ISO format, or None."""
+    if not value:
+        return None
+    for fmt in ("%B %d, %Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+def parse_salary(value):
+    """Convert a comma-formatted salary string to an integer, or None."""
+    if value is None:
+        return None
+    try:
+        return int(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+def derive_employee_columns(employee_data):
+    """
+    Compute the typed/indexed columns that mirror the display-formatted fields.
     
+    Args:
+        employee_data (dict): Employee data (may be partial)
+        
+    Returns:
+        dict: Values for start_date_iso, salary_monthly, salary_annual and status
+    """
+    derived = {}
+    if any(flag in employee_data for flag in ("offer_sent", "offer_accepted", "onboarding_completed")):
+        derived["status"] = employee_status(employee_data)
+    if "start_date" in employee_data:
+        derived["start_date_iso"] = parse_start_date(employee_data["start_date"])
+    if "annual_salary" in employee_data:
+        # The "annual_salary" field holds the monthly figure shown on the form
+        monthly = parse_salary(employee_data["annual_salary"])
+        derived["salary_monthly"] = monthly
+        derived["salary_annual"] = monthly * 12 if monthly is not None else None
+    return derived
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+def _migration_initial_schema(cur):
+
     # Create employees table
     cur.execute('''
     CREATE TABLE IF NOT EXISTS employees (
@@ -74,7 +223,7 @@ def init_db():
         updated_at TEXT
     )
     ''')
-    
+
     # Create documents table
     cur.execute('''
     CREATE TABLE IF NOT EXISTS documents (
@@ -87,24 +236,421 @@ def init_db():
         upload_date TEXT
     )
     ''')
+
+def _migration_typed_columns(cur):
+    # Typed mirrors of the display-formatted start date and salary, plus status
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(employees)")}
+    for column, column_type in [
+        ("start_date_iso", "TEXT"),
+        ("salary_monthly", "INTEGER"),
+        ("salary_annual", "INTEGER"),
+        ("status", "TEXT"),
+    ]:
+        if column not in existing:
+            cur.execute(f"ALTER TABLE employees ADD COLUMN {column} {column_type}")
+    
+    # Backfill existing rows (zipped by name, so any row factory works)
+    columns = ["id", "start_date", "annual_salary", "offer_sent", "offer_accepted", "onboarding_completed"]
+    rows = cur.execute(f"SELECT {', '.join(columns)} FROM employees").fetchall()
+    updates = []
+    for row in rows:
+        employee = dict(zip(columns, row))
+        derived = derive_employee_columns(employee)
+        updates.append((derived["start_date_iso"], derived["salary_monthly"], derived["salary_annual"], derived["status"], employee["id"]))
+    cur.executemany(
+        "UPDATE employees SET start_date_iso = ?, salary_monthly = ?, salary_annual = ?, status = ? WHERE id = ?",
+        updates
+    )
     
-    conn.commit()
-    conn.close()
-
-# Initialize the database if it doesn't exist
-init_db()
-
-# Sample company data
-COMPANY_INFO = {
-    "name": "AI Planet",
-    "address": "CIE IIIT Hyderabad, Vindhya C4, IIIT-H Campus, Gachibowli, Telangana 500032",
-    "website": "www.aiplanet.com",
-    "logo_path": "logo.png",
-    "mission": "Revolutionizing industries through cutting-edge AI solutions",
-    "vision": "To be the global leader in enterprise AI implementation and innovation",
-    "legal_name": "DPhi Tech Private Limited"
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_position ON employees (position)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_start_date ON employees (start_date_iso)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_status ON employees (status)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_salary ON employees (salary_monthly)")
+
+# SQL sort expressions for the candidate table, shared by queries and indexes
+STATUS_RANK_SQL = (
+    "(CASE status WHEN 'Onboarding Completed' THEN 4 WHEN 'Offer Accepted' THEN 3 "
+    "WHEN 'Offer Sent' THEN 2 ELSE 1 END)"
+)
+START_DATE_RECENT_SQL = "COALESCE(start_date_iso, '')"
+START_DATE_OLDEST_SQL = "COALESCE(start_date_iso, '9999-12-31')"
+
+def _migration_sort_indexes(cur):
+    # Composite (sort key, id) indexes so each dashboard sort can be paged by keyset
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_employees_name_nocase ON employees (name COLLATE NOCASE, id)")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_employees_status_rank ON employees ({STATUS_RANK_SQL}, id)")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_employees_start_recent ON employees ({START_DATE_RECENT_SQL}, id)")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_employees_start_oldest ON employees ({START_DATE_OLDEST_SQL}, id)")
+
+# Per-row contributions of an employee to each overview counter; "{row}" is NEW or OLD
+EMPLOYEE_STATS_TERMS = {
+    "total_offers": "1",
+    "offers_sent": "(COALESCE({row}.offer_sent, 0) != 0)",
+    "offers_accepted": "(COALESCE({row}.offer_accepted, 0) != 0)",
+    "pending_onboarding": "(COALESCE({row}.offer_accepted, 0) != 0 AND COALESCE({row}.onboarding_completed, 0) = 0)",
+    "onboarding_completed": "(COALESCE({row}.onboarding_completed, 0) != 0)",
 }
 
+def _migration_status_counters(cur):
+    # Single-row table of overview counters, kept current by triggers so the
+    # dashboard never has to aggregate the employees table
+    columns = ", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in EMPLOYEE_STATS_TERMS)
+    cur.execute(f"CREATE TABLE IF NOT EXISTS employee_stats (id INTEGER PRIMARY KEY CHECK (id = 1), {columns})")
+    
+    # Backfill from the existing rows
+    totals = ", ".join(f"COALESCE(SUM({term.format(row='employees')}), 0)" for term in EMPLOYEE_STATS_TERMS.values())
+    cur.execute(f"INSERT OR REPLACE INTO employee_stats (id, {', '.join(EMPLOYEE_STATS_TERMS)}) SELECT 1, {totals} FROM employees")
+    
+    deltas = {
+        "insert": lambda term: f"+ {term.format(row='NEW')}",
+        "update": lambda term: f"+ {term.format(row='NEW')} - {term.format(row='OLD')}",
+        "delete": lambda term: f"- {term.format(row='OLD')}",
+    }
+    for event, delta in deltas.items():
+        set_clause = ", ".join(f"{name} = {name} {delta(term)}" for name, term in EMPLOYEE_STATS_TERMS.items())
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_employee_stats_{event}
+            AFTER {event.upper()} ON employees
+            BEGIN
+                UPDATE employee_stats SET {set_clause} WHERE id = 1;
+            END
+        """)
+
+# Employee columns covered by the full-text search index, with bm25 weights
+SEARCH_COLUMNS = {
+    "name": 10.0,
+    "position": 5.0,
+    "email": 2.0,
+    "address": 1.0,
+    "offer_letter_file": 2.0,
+}
+
+def _migration_search_index(cur):
+    # Remember which generated letter belongs to each candidate
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(employees)")}
+    if "offer_letter_file" not in existing:
+        cur.execute("ALTER TABLE employees ADD COLUMN offer_letter_file TEXT")
+    
+    # External-content FTS5 index over employees, keyed by the employees rowid
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"NEW.{col}" for col in SEARCH_COLUMNS)
+    old_values = ", ".join(f"OLD.{col}" for col in SEARCH_COLUMNS)
+    changed = " OR ".join(f"OLD.{col} IS NOT NEW.{col}" for col in SEARCH_COLUMNS)
+    cur.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+            {columns},
+            content='employees',
+            content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3 4'
+        )
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_insert AFTER INSERT ON employees
+        BEGIN
+            INSERT INTO employees_fts (rowid, {columns}) VALUES (NEW.rowid, {new_values});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_delete AFTER DELETE ON employees
+        BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, {columns}) VALUES ('delete', OLD.rowid, {old_values});
+        END
+    """)
+    # Status-only updates leave the index untouched
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_employees_fts_update AFTER UPDATE ON employees
+        WHEN {changed}
+        BEGIN
+            INSERT INTO employees_fts (employees_fts, rowid, {columns}) VALUES ('delete', OLD.rowid, {old_values});
+            INSERT INTO employees_fts (rowid, {columns}) VALUES (NEW.rowid, {new_values});
+        END
+    """)
+    cur.execute("INSERT INTO employees_fts (employees_fts) VALUES ('rebuild')")
+
+def _migration_email_outbox(cur):
+    # Durable queue of outgoing email drained by the background delivery worker
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id TEXT PRIMARY KEY,
+        to_email TEXT NOT NULL,
+        sender_name TEXT,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        body_type TEXT NOT NULL DEFAULT 'plain',
+        attachment BLOB,
+        attachment_name TEXT,
+        employee_id TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TEXT NOT NULL,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        sent_at TEXT
+    )
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_created ON email_outbox (created_at)")
+
+def _migration_notification_history(cur):
+    # Durable history of every notification, replacing the per-session list
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        message TEXT,
+        priority TEXT NOT NULL DEFAULT 'normal'
+    )
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_notifications_priority ON notifications (priority, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_notifications_recipient ON notifications (recipient, id)")
+
+def _migration_data_version(cur):
+    # Counter bumped by every employees write, so derived views (dashboard
+    # analytics) can be cached until the underlying rows actually change
+    columns = [row[1] for row in cur.execute("PRAGMA table_info(employee_stats)").fetchall()]
+    if "data_version" not in columns:
+        cur.execute("ALTER TABLE employee_stats ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0")
+    for event in ("insert", "update", "delete"):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_employees_version_{event}
+            AFTER {event.upper()} ON employees
+            BEGIN
+                UPDATE employee_stats SET data_version = data_version + 1 WHERE id = 1;
+            END
+        """)
+
+# Offer letter file names: "<sanitized name>_<YYYYMMDD>_offer_letter.pdf"
+OFFER_LETTER_FILE_RE = re.compile(r"^(?P<name>.+)_(?P<date>\d{8})_offer_letter\.pdf$", re.IGNORECASE)
+
+def _letter_owner_resolver(cur):
+    """
+    Build a lookup from an offer letter file name to its owner
+    
+    Letters written before documents recorded their owner carry only the
+    candidate's name and the generation date in the file name. A file is
+    matched through employees.offer_letter_file first, then by name; when
+    several candidates share the name, the date picks the one created,
+    updated or sent an offer that day.
+    
+    Returns:
+        callable: file name -> (employee_id, name, position); employee_id is
+                  None when no single candidate matches
+    """
+    by_file, by_name = {}, {}
+    rows = cur.execute(
+        "SELECT id, name, position, offer_letter_file, created_at, updated_at, offer_sent_date FROM employees"
+    ).fetchall()
+    for employee_id, name, position, letter_file, *dates in rows:
+        owner = (employee_id, name, position)
+        if letter_file:
+            by_file[letter_file] = owner
+        days = {re.sub(r"\D", "", value)[:8] for value in dates if value}
+        by_name.setdefault(offer_letter_name_part(name).lower(), []).append((owner, days))
+    
+    def resolve(filename):
+        if filename in by_file:
+            return by_file[filename]
+        match = OFFER_LETTER_FILE_RE.match(filename)
+        if not match:
+            return None, filename.split('_')[0], None
+        candidates = by_name.get(match["name"].lower(), [])
+        if len(candidates) > 1:
+            candidates = [candidate for candidate in candidates if match["date"] in candidate[1]]
+        if len(candidates) == 1:
+            return candidates[0][0]
+        return None, match["name"].replace('_', ' '), None
+    return resolve
+
+def _migration_document_index(cur):
+    # Index stored files in the documents table so the gallery never has to scan the disk
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(documents)")}
+    for column, column_type in [("employee_id", "TEXT"), ("size_bytes", "INTEGER")]:
+        if column not in existing:
+            cur.execute(f"ALTER TABLE documents ADD COLUMN {column} {column_type}")
+    
+    # One row per stored file, so regenerating a letter replaces its entry
+    cur.execute("DELETE FROM documents WHERE rowid NOT IN (SELECT MAX(rowid) FROM documents GROUP BY file_path)")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_file_path ON documents (file_path)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_documents_category_date ON documents (category, upload_date, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_documents_employee ON documents (employee_id)")
+    
+    # Register letters generated before the index existed
+    resolve_owner = _letter_owner_resolver(cur)
+    documents = []
+    for path in DOCUMENTS_DIR.glob("*.pdf"):
+        if "offer_letter" not in path.name.lower():
+            continue
+        stat = path.stat()
+        employee_id, name, position = resolve_owner(path.name)
+        documents.append((
+            str(uuid.uuid4()), name, OFFER_LETTER_CATEGORY, position, str(path), employee_id, stat.st_size,
+            datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        ))
+    cur.executemany(
+        "INSERT OR IGNORE INTO documents (id, name, category, role, file_path, employee_id, size_bytes, upload_date) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        documents
+    )
+
+def _migration_document_owners(cur):
+    # Attach letters that migration 9 indexed without an owner to their candidate
+    resolve_owner = _letter_owner_resolver(cur)
+    unowned = cur.execute(
+        "SELECT id, file_path FROM documents WHERE employee_id IS NULL AND category = ?", (OFFER_LETTER_CATEGORY,)
+    ).fetchall()
+    updates = []
+    for document_id, file_path in unowned:
+        employee_id, name, position = resolve_owner(Path(file_path).name)
+        updates.append((employee_id, name, position, document_id))
+    cur.executemany("UPDATE documents SET employee_id = ?, name = ?, role = COALESCE(?, role) WHERE id = ?", updates)
+
+def _migration_outbox_lease(cur):
+    # Claims carry a timestamp so only abandoned ones are retried, and delivered
+    # messages no longer keep their PDF attachment
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(email_outbox)")}
+    if "claimed_at" not in existing:
+        cur.execute("ALTER TABLE email_outbox ADD COLUMN claimed_at TEXT")
+    cur.execute("UPDATE email_outbox SET attachment = NULL WHERE status = 'sent' AND attachment IS NOT NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_claimed ON email_outbox (status, claimed_at)")
+
+def _migration_app_settings(cur):
+    # Settings changed from the Settings page, kept across restarts
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS app_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    ''')
+
+MIGRATIONS = [
+    (1, _migration_initial_schema),
+    (2, _migration_typed_columns),
+    (3, _migration_sort_indexes),
+    (4, _migration_status_counters),
+    (5, _migration_search_index),
+    (6, _migration_email_outbox),
+    (7, _migration_notification_history),
+    (8, _migration_data_version),
+    (9, _migration_document_index),
+    (10, _migration_document_owners),
+    (11, _migration_outbox_lease),
+    (12, _migration_app_settings),
+]
+
+def run_migrations(conn):
+    """
+    Apply any pending migrations, each in its own write transaction.
+    
+    Args:
+        conn (sqlite3.Connection): Connection to migrate
+        
+    Returns:
+        int: Schema version after migrating
+    """
+    # Already up to date (every run after the first): skip the write lock entirely
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current >= MIGRATIONS[-1][0]:
+        return current
+    
+    for version, migrate in MIGRATIONS:
+        # Take the write lock before re-reading the version so concurrent
+        # processes never apply the same migration twice
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > current:
+                migrate(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def init_db():
+    with get_connection() as conn:
+        return run_migrations(conn)
+
+def rebuild_search_index():
+    """Rebuild the full-text index from employees (e.g. after a VACUUM renumbers rowids)."""
+    with get_connection() as conn:
+        conn.execute("INSERT INTO employees_fts (employees_fts) VALUES ('rebuild')")
+
+def _load_company_info():
+    """Sample company data."""
+    return {
+        "name": "AI Planet",
+        "address": "CIE IIIT Hyderabad, Vindhya C4, IIIT-H Campus, Gachibowli, Telangana 500032",
+        "website": "www.aiplanet.com",
+        "logo_path": "logo.png",
+        "mission": "Revolutionizing industries through cutting-edge AI solutions",
+        "vision": "To be the global leader in enterprise AI implementation and innovation",
+        "legal_name": "DPhi Tech Private Limited"
+    }
+
+def _load_roles():
+    """Sample roles and their documentation requirements."""
+    return {
+        "Full Stack Developer": {
+            "description": "Develop and maintain both frontend and backend components of our applications",
+            "skills_required": ["JavaScript", "Python", "React", "Node.js", "MongoDB", "AWS"],
+            "onboarding_docs": ["tech_stack.pdf", "coding_standards.pdf", "git_workflow.pdf"],
+            "training_modules": ["Frontend Development", "Backend Architecture", "DevOps Basics"]
+        },
+        "Business Analyst": {
+            "description": "Analyze business requirements and translate them into technical specifications",
+            "skills_required": ["Data Analysis", "SQL", "Requirements Gathering", "Agile Methodologies"],
+            "onboarding_docs": ["business_processes.pdf", "requirement_templates.pdf", "data_analysis_tools.pdf"],
+            "training_modules": ["Business Requirements Analysis", "Stakeholder Management", "Agile Project Management"]
+        },
+        "Data Scientist": {
+            "description": "Build and deploy machine learning models to solve complex business problems",
+            "skills_required": ["Python", "Machine Learning", "Statistics", "Data Visualization"],
+            "onboarding_docs": ["ml_pipelines.pdf", "data_governance.pdf", "model_deployment.pdf"],
+            "training_modules": ["Machine Learning Fundamentals", "Model Evaluation", "Production ML Systems"]
+        },
+        "Product Manager": {
+            "description": "Define product vision and roadmap, and work with cross-functional teams to deliver products",
+            "skills_required": ["Product Strategy", "Market Research", "User Experience", "Agile/Scrum"],
+            "onboarding_docs": ["product_lifecycle.pdf", "roadmap_planning.pdf", "user_research.pdf"],
+            "training_modules": ["Product Strategy", "User Research", "Agile Product Management"]
+        }
+    }
+
+# Shared, read-only state set up once per server process
+AppResources = namedtuple("AppResources", ["schema_version", "company_info", "roles", "missing_assets"])
+
+@st.cache_resource(show_spinner=False)
+def bootstrap():
+    """
+    One-time process setup, reused by every session and rerun
+    
+    Creates the data directories, applies pending schema migrations and
+    loads the company and role configuration. Streamlit re-executes this
+    script on every interaction, so none of this belongs on the rerun path.
+    
+    Returns:
+        AppResources: schema_version, company_info, roles and the letter
+                      template assets that are missing from the working directory
+    """
+    for directory in DATA_DIRECTORIES:
+        directory.mkdir(exist_ok=True, parents=True)
+    schema_version = init_db()
+    return AppResources(
+        schema_version=schema_version,
+        company_info=_load_company_info(),
+        roles=_load_roles(),
+        missing_assets=tuple(asset for asset in LETTER_ASSETS if not os.path.exists(asset))
+    )
+
+APP_RESOURCES = bootstrap()
+# Shared by all sessions; treat as read-only
+COMPANY_INFO = APP_RESOURCES.company_info
+ROLES = APP_RESOURCES.roles
+
 # Initialize session state variables
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -127,35 +673,13 @@ if 'email_confirmation_mode' not in st.session_state:
 if 'notification_email' not in st.session_state:
     st.session_state.notification_email = "hr@aiplanet.com"
 if 'notification_history' not in st.session_state:
-    st.session_state.notification_history = []
-
-# Sample roles and their documentation requirements
-ROLES = {
-    "Full Stack Developer": {
-        "description": "Develop and maintain both frontend and backend components of our applications",
-        "skills_required": ["JavaScript", "Python", "React", "Node.js", "MongoDB", "AWS"],
-        "onboarding_docs": ["tech_stack.pdf", "coding_standards.pdf", "git_workflow.pdf"],
-        "training_modules": ["Frontend Development", "Backend Architecture", "DevOps Basics"]
-    },
-    "Business Analyst": {
-        "description": "Analyze business requirements and translate them into technical specifications",
-        "skills_required": ["Data Analysis", "SQL", "Requirements Gathering", "Agile Methodologies"],
-        "onboarding_docs": ["business_processes.pdf", "requirement_templates.pdf", "data_analysis_tools.pdf"],
-        "training_modules": ["Business Requirements Analysis", "Stakeholder Management", "Agile Project Management"]
-    },
-    "Data Scientist": {
-        "description": "Build and deploy machine learning models to solve complex business problems",
-        "skills_required": ["Python", "Machine Learning", "Statistics", "Data Visualization"],
-        "onboarding_docs": ["ml_pipelines.pdf", "data_governance.pdf", "model_deployment.pdf"],
-        "training_modules": ["Machine Learning Fundamentals", "Model Evaluation", "Production ML Systems"]
-    },
-    "Product Manager": {
-        "description": "Define product vision and roadmap, and work with cross-functional teams to deliver products",
-        "skills_required": ["Product Strategy", "Market Research", "User Experience", "Agile/Scrum"],
-        "onboarding_docs": ["product_lifecycle.pdf", "roadmap_planning.pdf", "user_research.pdf"],
-        "training_modules": ["Product Strategy", "User Research", "Agile Product Management"]
-    }
-}
+    # Only the most recent notifications are kept per session; the full history is in SQLite
+    st.session_state.notification_history = deque(maxlen=NOTIFICATION_RECENT_LIMIT)
+if 'selected_candidates' not in st.session_state:
+    st.session_state.selected_candidates = set()
+if 'perf_traces' not in st.session_state:
+    # Timing traces of this session's most recent reruns
+    st.session_state.perf_traces = deque(maxlen=PERF_TRACE_RERUNS)
 
 # Template for offer letter email
 OFFER_EMAIL_TEMPLATE = """
@@ -177,365 +701,1488 @@ Best regards,
 
 
 # Function to validate email format
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
 def is_valid_email(email):
-    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.match(email) is not None
 
 # Database functions
+@traced("db.get_employees")
 def get_employees():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM employees")
-    rows = cur.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        rows = conn.execute("SELECT * FROM employees").fetchall()
     
     # Convert to list of dicts
     return [dict(row) for row in rows]
 
+@traced("db.get_employee_by_id")
 def get_employee_by_id(employee_id):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM employees WHERE id = ?", (employee_id,))
-    row = cur.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM employees WHERE id = ?", (employee_id,)).fetchone()
     
     return dict(row) if row else None
 
-def save_employee(employee_data):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
-    # Check if employee exists
-    cur.execute("SELECT id FROM employees WHERE id = ?", (employee_data["id"],))
-    exists = cur.fetchone()
+def build_fts_query(search_term):
+    """Turn free text into an FTS5 query that prefix-matches every word, or None."""
+    tokens = re.findall(r"\w+", search_term or "")
+    return " ".join(f'"{token}"*' for token in tokens) or None
+
+@traced("db.search_employees")
+def search_employees(search_term, limit=50, after=None):
+    """
+    Ranked full-text search over candidates and their offer letter filenames
     
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    Args:
+        search_term (str): Free text; every word is matched as a prefix
+        limit (int): Maximum number of results
+        after (tuple, optional): (score, id) of the last row of the previous page
+        
+    Returns:
+        list: Matching employee dicts, best match first (lowest bm25 score)
+    """
+    fts_query = build_fts_query(search_term)
+    if not fts_query:
+        return []
+    
+    weights = ", ".join(str(weight) for weight in SEARCH_COLUMNS.values())
+    params = [fts_query]
+    cursor_clause = ""
+    if after:
+        # bm25 is computed per match, so there is no index to seek; the FTS
+        # query already visits every match and this only skips earlier pages
+        cursor_clause = "AND (score > ? OR (score = ? AND e.id > ?))"
+        params.extend([after[0], after[0], after[1]])
+    with get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT * FROM (
+                SELECT e.id, e.name, e.position, e.email, e.start_date, e.status, e.offer_letter_file,
+                       bm25(employees_fts, {weights}) AS score
+                FROM employees_fts
+                JOIN employees e ON e.rowid = employees_fts.rowid
+                WHERE employees_fts MATCH ?
+            ) AS e
+            WHERE 1 = 1 {cursor_clause}
+            ORDER BY score, id
+            LIMIT ?
+        """, params + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+# Dashboard sort options mapped to (SQL sort expression, direction)
+CANDIDATE_SORT_OPTIONS = {
+    "Name (A-Z)": ("name COLLATE NOCASE", "ASC"),
+    "Name (Z-A)": ("name COLLATE NOCASE", "DESC"),
+    "Status": (STATUS_RANK_SQL, "DESC"),
+    "Start Date (Recent)": (START_DATE_RECENT_SQL, "DESC"),
+    "Start Date (Oldest)": (START_DATE_OLDEST_SQL, "ASC"),
+}
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+# Offered while a search term is entered: best bm25 match first, see search_employees
+RELEVANCE_SORT_OPTION = "Relevance"
+
+def candidate_page_query(search_term="", sort_option="Name (A-Z)", after=None):
+    """
+    Build the SQL for one page of query_employees
     
-    if not exists:
-        # Insert new employee
-        employee_data["created_at"] = now
-        employee_data["updated_at"] = now
+    Args:
+        search_term (str): Full-text prefix search, see build_fts_query
+        sort_option (str): Key of CANDIDATE_SORT_OPTIONS
+        after (tuple, optional): Keyset cursor (sort_key, id) of the previous page's last row
         
-        # Create columns and values list
-        columns = list(employee_data.keys())
-        placeholders = ["?"] * len(columns)
-        values = [employee_data[col] for col in columns]
+    Returns:
+        tuple: (query, params); the query ends in "LIMIT ?", which the caller binds
+    """
+    sort_expr, direction = CANDIDATE_SORT_OPTIONS[sort_option]
+    inclusive, strict = (">=", ">") if direction == "ASC" else ("<=", "<")
+    
+    clauses, params = [], []
+    fts_query = build_fts_query(search_term)
+    if fts_query:
+        clauses.append("rowid IN (SELECT rowid FROM employees_fts WHERE employees_fts MATCH ?)")
+        params.append(fts_query)
+    if after:
+        # Spelled out rather than as a row-value comparison, which SQLite
+        # plans as a full index scan: the range on sort_expr seeks into the
+        # (sort_expr, id) index and the OR only trims the first equal keys
+        clauses.append(f"{sort_expr} {inclusive} ? AND ({sort_expr} {strict} ? OR id {strict} ?)")
+        params.extend([after[0], after[0], after[1]])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    
+    query = f"""
+        SELECT id, name, position, start_date, status, {sort_expr} AS sort_key
+        FROM employees {where}
+        ORDER BY {sort_expr} {direction}, id {direction}
+        LIMIT ?
+    """
+    return query, params
+
+@traced("db.query_employees")
+def query_employees(search_term="", sort_option="Name (A-Z)", page_size=25, after=None):
+    """
+    Fetch one page of candidates, filtered, sorted and paginated inside SQLite
+    
+    Args:
+        search_term (str): Full-text prefix search over name, position, email, address and letter file
+        sort_option (str): Key of CANDIDATE_SORT_OPTIONS, or RELEVANCE_SORT_OPTION with a search term
+        page_size (int): Maximum number of rows to return
+        after (tuple, optional): Keyset cursor returned for the previous page
         
-        query = f"INSERT INTO employees ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-        cur.execute(query, values)
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    if sort_option == RELEVANCE_SORT_OPTION:
+        # Fetch one extra row to learn whether another page exists
+        rows = search_employees(search_term, limit=page_size + 1, after=after)
+        sort_key = "score"
     else:
-        # Update existing employee
-        employee_data["updated_at"] = now
-        
-        # Create set clause and values list
-        set_items = [f"{col} = ?" for col in employee_data.keys() if col != "id"]
-        values = [employee_data[col] for col in employee_data.keys() if col != "id"]
-        values.append(employee_data["id"])  # for WHERE clause
+        query, params = candidate_page_query(search_term, sort_option, after)
+        with get_connection() as conn:
+            rows = [dict(row) for row in conn.execute(query, params + [page_size + 1]).fetchall()]
+        sort_key = "sort_key"
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1][sort_key], rows[-1]["id"])
+    return rows, next_cursor
+
+@traced("db.get_dashboard_counts")
+def get_dashboard_counts():
+    """
+    Read the trigger-maintained overview counters
+    
+    Returns:
+        dict: total_offers, offers_sent, offers_accepted, pending_onboarding, onboarding_completed
+    """
+    with get_connection() as conn:
+        row = conn.execute(f"SELECT {', '.join(EMPLOYEE_STATS_TERMS)} FROM employee_stats WHERE id = 1").fetchone()
+    return dict(row) if row else dict.fromkeys(EMPLOYEE_STATS_TERMS, 0)
+
+@traced("db.get_data_version")
+def get_data_version():
+    """Return the employees table's write counter (changes on every insert, update or delete)."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT data_version FROM employee_stats WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_dashboard_analytics(data_version, today):
+    """
+    Load the employee analytics columns once and aggregate them with pandas
+    
+    Args:
+        data_version (int): Cache key from get_data_version()
+        today (str): ISO date the start-date buckets are relative to
         
-        query = f"UPDATE employees SET {', '.join(set_items)} WHERE id = ?"
-        cur.execute(query, values)
+    Returns:
+        dict: See analytics.compute_dashboard_metrics
+    """
+    with get_connection() as conn:
+        frame = load_employee_frame(conn)
+    return compute_dashboard_metrics(frame, today)
+
+@traced("db.get_employees_by_ids")
+def get_employees_by_ids(employee_ids):
+    """Fetch several employees by id, in chunks that stay under SQLite's variable limit."""
+    employee_ids = list(employee_ids)
+    employees = []
+    with get_connection() as conn:
+        for start in range(0, len(employee_ids), 500):
+            chunk = employee_ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT * FROM employees WHERE id IN ({', '.join(['?'] * len(chunk))})", chunk
+            ).fetchall()
+            employees.extend(dict(row) for row in rows)
+    return employees
+
+@traced("db.save_employee")
+def save_employee(employee_data):
+    # Keep the typed, indexed columns in step with the formatted fields
+    employee_data.update(derive_employee_columns(employee_data))
     
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Check if employee exists
+        cur.execute("SELECT id FROM employees WHERE id = ?", (employee_data["id"],))
+        exists = cur.fetchone()
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        if not exists:
+            # Insert new employee
+            employee_data["created_at"] = now
+            employee_data["updated_at"] = now
+            
+            # Create columns and values list
+            columns = list(employee_data.keys())
+            placeholders = ["?"] * len(columns)
+            values = [employee_data[col] for col in columns]
+            
+            query = f"INSERT INTO employees ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
+            cur.execute(query, values)
+        else:
+            # Update existing employee
+            employee_data["updated_at"] = now
+            
+            # Create set clause and values list
+            set_items = [f"{col} = ?" for col in employee_data.keys() if col != "id"]
+            values = [employee_data[col] for col in employee_data.keys() if col != "id"]
+            values.append(employee_data["id"])  # for WHERE clause
+            
+            query = f"UPDATE employees SET {', '.join(set_items)} WHERE id = ?"
+            cur.execute(query, values)
 
+@traced("db.get_documents")
 def get_documents(category=None, role=None):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    
-    if category and role:
-        cur.execute("SELECT * FROM documents WHERE category = ? AND role = ?", (category, role))
-    elif category:
-        cur.execute("SELECT * FROM documents WHERE category = ?", (category,))
-    else:
-        cur.execute("SELECT * FROM documents")
-    
-    rows = cur.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        if category and role:
+            cur.execute("SELECT * FROM documents WHERE category = ? AND role = ?", (category, role))
+        elif category:
+            cur.execute("SELECT * FROM documents WHERE category = ?", (category,))
+        else:
+            cur.execute("SELECT * FROM documents")
+        
+        rows = cur.fetchall()
     
     # Convert to list of dicts
     return [dict(row) for row in rows]
 
+@traced("db.save_document")
 def save_document(document_data):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
-    # Insert new document
-    columns = list(document_data.keys())
-    placeholders = ["?"] * len(columns)
-    values = [document_data[col] for col in columns]
-    
-    query = f"INSERT INTO documents ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-    cur.execute(query, values)
-    
-    conn.commit()
-    conn.close()
-
-# Helper function to replace non-latin1 characters
-def clean_for_latin1(text):
-    # Replace problematic characters
-    replacements = {
-        '\u2013': '-',  # en-dash
-        '\u2014': '-',  # em-dash
-        '\u2018': "'",  # left single quote
-        '\u2019': "'",  # right single quote
-        '\u201c': '"',  # left double quote
-        '\u201d': '"',  # right double quote
-        '\u2022': '*',  # bullet
-        '\u2026': '...',  # ellipsis
-        '\u00a0': ' ',  # non-breaking space
+    with get_connection() as conn:
+        # Insert new document, replacing any earlier entry for the same file
+        columns = list(document_data.keys())
+        placeholders = ["?"] * len(columns)
+        values = [document_data[col] for col in columns]
+        
+        query = f"INSERT OR REPLACE INTO documents ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
+        conn.execute(query, values)
+
+def register_offer_letter(employee, file_path):
+    """Record a stored offer letter in the documents index and queue its page previews."""
+    file_path = Path(file_path)
+    save_document({
+        "id": str(uuid.uuid4()),
+        "name": employee.get("name") or file_path.stem,
+        "category": OFFER_LETTER_CATEGORY,
+        "role": employee.get("position"),
+        "file_path": str(file_path),
+        "employee_id": employee.get("id"),
+        "size_bytes": file_path.stat().st_size,
+        "uploaded_by": st.session_state.get("user_role"),
+        "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    get_preview_renderer().submit(file_path)
+
+def _unowned_letter_match(search_term, alias=""):
+    """
+    SQL condition and parameters matching unowned documents against a search
+    
+    Letters with no employee_id have no full-text row to match, so every word
+    of the search must instead appear in the document's name or file path.
+    
+    Args:
+        search_term (str): Free text, as passed to build_fts_query
+        alias (str): Table alias prefix for the documents columns, e.g. "d."
+    """
+    words = re.findall(r"\w+", search_term or "")
+    word_clause = f"({alias}name LIKE ? ESCAPE '\\' OR {alias}file_path LIKE ? ESCAPE '\\')"
+    params = []
+    for word in words:
+        pattern = "%" + re.sub(r"([%_\\])", r"\\\1", word) + "%"
+        params.extend([pattern, pattern])
+    return f"({alias}employee_id IS NULL AND {' AND '.join([word_clause] * len(words))})", params
+
+@traced("db.query_offer_letters")
+def query_offer_letters(search_term="", page_size=20, before=None):
+    """
+    Fetch one page of indexed offer letters, newest first
+    
+    Args:
+        search_term (str): Full-text search over the candidates the letters belong to;
+                           letters with no known owner match on their name and file name
+        page_size (int): Maximum number of rows to return
+        before (tuple, optional): (upload_date, id) keyset cursor from the previous page
+        
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    clauses = ["category = ?"]
+    params = [OFFER_LETTER_CATEGORY]
+    if search_term:
+        fts_query = build_fts_query(search_term)
+        if not fts_query:
+            return [], None
+        unowned, unowned_params = _unowned_letter_match(search_term)
+        clauses.append(f"""(employee_id IN (
+            SELECT e.id FROM employees_fts JOIN employees e ON e.rowid = employees_fts.rowid
+            WHERE employees_fts MATCH ?
+        ) OR {unowned})""")
+        params.append(fts_query)
+        params.extend(unowned_params)
+    if before:
+        # Written out so SQLite seeks idx_documents_category_date; see candidate_page_query
+        clauses.append("upload_date <= ? AND (upload_date < ? OR id < ?)")
+        params.extend([before[0], before[0], before[1]])
+    
+    query = f"""
+        SELECT id, name, role, file_path, employee_id, size_bytes, upload_date
+        FROM documents
+        WHERE {' AND '.join(clauses)}
+        ORDER BY upload_date DESC, id DESC
+        LIMIT ?
+    """
+    with get_connection() as conn:
+        rows = [dict(row) for row in conn.execute(query, params + [page_size + 1]).fetchall()]
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]["upload_date"], rows[-1]["id"])
+    return rows, next_cursor
+
+@traced("db.record_notification")
+def record_notification(recipient, subject, message, priority="normal"):
+    """
+    Persist a notification, trimming the oldest rows beyond NOTIFICATION_HISTORY_LIMIT
+    
+    Returns:
+        dict: The stored notification without its message body
+    """
+    entry = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "recipient": recipient,
+        "subject": subject,
+        "priority": priority
+    }
+    with get_connection() as conn:
+        cur = conn.execute(
+            "INSERT INTO notifications (created_at, recipient, subject, message, priority) VALUES (?, ?, ?, ?, ?)",
+            (entry["timestamp"], recipient, subject, message, priority)
+        )
+        entry["id"] = cur.lastrowid
+        # Trim occasionally rather than on every insert
+        if entry["id"] % 100 == 0:
+            conn.execute("DELETE FROM notifications WHERE id <= ?", (entry["id"] - NOTIFICATION_HISTORY_LIMIT,))
+    return entry
+
+@traced("db.query_notifications")
+def query_notifications(priorities=None, search_term="", page_size=20, before_id=None):
+    """
+    Fetch one page of notification history, newest first
+    
+    Args:
+        priorities (list, optional): Only include these priorities
+        search_term (str): Case-insensitive substring of the subject or recipient
+        page_size (int): Maximum number of rows to return
+        before_id (int, optional): Keyset cursor returned for the previous page
+        
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    clauses, params = [], []
+    if priorities:
+        clauses.append(f"priority IN ({', '.join(['?'] * len(priorities))})")
+        params.extend(priorities)
+    if search_term:
+        pattern = "%" + re.sub(r"([%_\\])", r"\\\1", search_term) + "%"
+        clauses.append("(subject LIKE ? ESCAPE '\\' OR recipient LIKE ? ESCAPE '\\')")
+        params.extend([pattern, pattern])
+    if before_id:
+        clauses.append("id < ?")
+        params.append(before_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM notifications {where} ORDER BY id DESC LIMIT ?",
+            params + [page_size + 1]
+        ).fetchall()
+    rows = [dict(row) for row in rows]
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = rows[-1]["id"]
+    return rows, next_cursor
+
+def get_app_setting(key, default=None):
+    """Return a saved app setting as text, or default if it was never saved."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT value FROM app_settings WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else default
+
+def set_app_setting(key, value):
+    """Save an app setting, replacing any previous value."""
+    with get_connection() as conn:
+        conn.execute(
+            "INSERT INTO app_settings (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+# Bulk candidate import
+EMPLOYMENT_TYPES = ["Full-time", "Intern", "Contract"]
+IMPORT_REQUIRED_FIELDS = ["name", "email", "position", "start_date", "address"]
+IMPORT_BATCH_SIZE = 1000
+
+# Defaults for optional columns, matching the single-candidate form
+IMPORT_DEFAULTS = {
+    "employment_type": "Full-time",
+    "location": "AI Planet HQ, Hyderabad",
+    "annual_salary": "37500",
+    "reporting_manager": "Chanukya Patnaik",
+    "bonus_details": "Performance-based annual bonus based on company performance",
+    "equity_details": "ESOPs based on a four-year vesting schedule with a one-year cliff",
+    "benefits": "Health insurance; flexible work hours; remote work options",
+    "contingencies": "successful background check and reference verification",
+    "hr_name": "Eswar Viswanathan",
+    "contract_months": "6",
+}
+
+# Alternative spreadsheet headers accepted for each field
+IMPORT_COLUMN_ALIASES = {
+    "full_name": "name",
+    "email_address": "email",
+    "role": "position",
+    "joining_date": "start_date",
+    "salary": "annual_salary",
+    "monthly_salary": "annual_salary",
+    "work_location": "location",
+}
+
+def _normalize_header(header):
+    key = re.sub(r"\W+", "_", str(header or "").strip().lower()).strip("_")
+    return IMPORT_COLUMN_ALIASES.get(key, key)
+
+def iter_import_rows(uploaded_file):
+    """
+    Stream rows from an uploaded CSV or XLSX file as dicts with normalized headers
+    
+    Args:
+        uploaded_file: File-like object with a ``name`` attribute
+        
+    Yields:
+        tuple: (row_number, row_dict) where row_number is the spreadsheet line
+    
+    Raises:
+        UnicodeDecodeError, csv.Error: The CSV is not UTF-8 or is malformed
+        zipfile.BadZipFile, openpyxl InvalidFileException: The XLSX is not a workbook
+    """
+    if uploaded_file.name.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook  # Only needed for Excel uploads
+        from openpyxl.utils.exceptions import InvalidFileException
+        
+        try:
+            workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        except KeyError as e:
+            # A ZIP archive without the workbook's package parts
+            raise InvalidFileException(f"not an Excel workbook (missing {e})") from e
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [_normalize_header(h) for h in next(rows, [])]
+            for row_number, values in enumerate(rows, 2):
+                if any(value not in (None, "") for value in values):
+                    yield row_number, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for row_number, values in enumerate(reader, 2):
+            if any(value.strip() for value in values):
+                yield row_number, dict(zip(headers, values))
+
+def build_import_employee(row):
+    """
+    Validate one import row and build the employee record for it
+    
+    Args:
+        row (dict): Row with normalized headers
+        
+    Returns:
+        tuple: (employee_data, errors) where employee_data is None if errors is non-empty
+    """
+    values = {}
+    for key, value in row.items():
+        if isinstance(value, datetime):
+            value = value.strftime("%Y-%m-%d")
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        values[key] = "" if value is None else str(value).strip()
+    
+    errors = [f"{field} is required" for field in IMPORT_REQUIRED_FIELDS if not values.get(field)]
+    for field, default in IMPORT_DEFAULTS.items():
+        values[field] = values.get(field) or default
+    
+    if values.get("email") and not is_valid_email(values["email"]):
+        errors.append(f"invalid email '{values['email']}'")
+    
+    roles_by_name = {role.lower(): role for role in ROLES}
+    position = roles_by_name.get(values.get("position", "").lower())
+    if values.get("position") and not position:
+        errors.append(f"unknown role '{values['position']}'")
+    
+    start_date_iso = parse_start_date(values.get("start_date"))
+    if values.get("start_date") and not start_date_iso:
+        errors.append(f"unrecognised start date '{values['start_date']}'")
+    
+    employment_type = {t.lower(): t for t in EMPLOYMENT_TYPES}.get(values["employment_type"].lower())
+    if not employment_type:
+        errors.append(f"employment type must be one of {', '.join(EMPLOYMENT_TYPES)}")
+    
+    salary = parse_salary(values["annual_salary"])
+    if salary is None or salary < 0:
+        errors.append(f"invalid salary '{values['annual_salary']}'")
+    
+    contract_months = parse_salary(values["contract_months"])
+    if employment_type == "Contract" and not contract_months:
+        errors.append(f"invalid contract duration '{values['contract_months']}'")
+    
+    if errors:
+        return None, errors
+    
+    start_date = datetime.strptime(start_date_iso, "%Y-%m-%d")
+    end_date = None
+    if employment_type == "Contract":
+        end_date = (start_date + timedelta(days=30*contract_months)).strftime("%B %d, %Y")
+    
+    employee_data = {
+        "id": str(uuid.uuid4()),
+        "name": values["name"],
+        "email": values["email"],
+        "address": values["address"],
+        "position": position,
+        "start_date": start_date.strftime("%B %d, %Y"),
+        "end_date": end_date,
+        "employment_type": employment_type,
+        "location": values["location"],
+        "annual_salary": f"{salary:,}",
+        "bonus_details": values["bonus_details"],
+        "equity_details": values["equity_details"],
+        "benefits": values["benefits"],
+        "contingencies": values["contingencies"],
+        "hr_name": values["hr_name"],
+        "offer_sent": False,
+        "offer_accepted": False,
+        "onboarding_completed": False,
+        "reporting_manager": values["reporting_manager"],
     }
+    employee_data.update(derive_employee_columns(employee_data))
+    return employee_data, []
+
+@traced("db.import_employees")
+def import_employees(rows):
+    """
+    Validate and insert candidates in bulk, in a single transaction
+    
+    Args:
+        rows: Iterable of (row_number, row_dict), e.g. from iter_import_rows
+        
+    Returns:
+        tuple: (imported_count, error_report) where error_report lists
+               {"row": row_number, "name": ..., "errors": "..."} for rejected rows
+    """
+    imported = 0
+    error_report = []
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    with get_connection() as conn:
+        columns = None
+        batch = []
+        
+        def flush():
+            conn.executemany(
+                f"INSERT INTO employees ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                batch
+            )
+            batch.clear()
+        
+        for row_number, row in rows:
+            employee_data, errors = build_import_employee(row)
+            if errors:
+                error_report.append({"row": row_number, "name": row.get("name") or "", "errors": "; ".join(errors)})
+                continue
+            
+            employee_data["created_at"] = now
+            employee_data["updated_at"] = now
+            columns = columns or list(employee_data.keys())
+            batch.append([employee_data[col] for col in columns])
+            imported += 1
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+        
+        if batch:
+            flush()
     
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
+    return imported, error_report
+
+# Bulk export settings
+EXPORT_CHUNK_ROWS = 500
+EXPORT_RETENTION_SECONDS = 24 * 60 * 60
+EXPORT_FORMATS = ["CSV", "Parquet"]
+# Candidate columns written to export archives, in order. Credentials such as
+# initial_password are deliberately absent: exports are downloaded and shared
+# outside the app, so a new column is only exported once it is listed here.
+EXPORT_COLUMNS = [
+    "id", "name", "email", "address", "position", "employment_type", "location",
+    "start_date", "start_date_iso", "end_date",
+    "annual_salary", "salary_monthly", "salary_annual", "bonus_details", "equity_details", "benefits", "contingencies",
+    "status", "offer_sent", "offer_sent_date", "offer_accepted", "onboarding_completed", "offer_letter_file",
+    "hr_name", "company_email", "reporting_manager", "manager_email", "buddy_name",
+    "created_at", "updated_at",
+]
+
+def _export_scope(search_term="", employee_ids=None):
+    """SQL condition (on employees aliased as e) and parameters selecting the candidates to export."""
+    if employee_ids is not None:
+        # json_each avoids SQLite's bound-variable limit for large selections
+        return "e.id IN (SELECT value FROM json_each(?))", [json.dumps(list(employee_ids))]
+    fts_query = build_fts_query(search_term)
+    if fts_query:
+        return "e.rowid IN (SELECT rowid FROM employees_fts WHERE employees_fts MATCH ?)", [fts_query]
+    return "1 = 1", []
+
+def _export_letter_scope(search_term="", employee_ids=None):
+    """
+    SQL condition and parameters selecting the letters to export
+    
+    Applies to documents d LEFT JOIN employees e: letters whose candidate is
+    in the export scope, plus unowned letters when the export is not limited
+    to selected candidates (all of them, or those matching the search).
+    """
+    where, params = _export_scope(search_term, employee_ids)
+    if employee_ids is not None:
+        return where, params
+    if not build_fts_query(search_term):
+        return "1 = 1", []
+    unowned, unowned_params = _unowned_letter_match(search_term, alias="d.")
+    return f"({where} OR {unowned})", params + unowned_params
+
+def _write_employees_csv(stream, cursor):
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow([column[0] for column in cursor.description])
+    count = 0
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+        if not rows:
+            break
+        writer.writerows(rows)
+        count += len(rows)
+    text.flush()
+    text.detach()
+    return count
+
+def _write_employees_parquet(stream, cursor, column_types):
+    import pyarrow as pa  # Only needed for Parquet exports
+    import pyarrow.parquet as pq
+    
+    arrow_types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    converters = {"INTEGER": lambda v: v if isinstance(v, int) else None, "REAL": lambda v: float(v) if isinstance(v, (int, float)) else None}
+    columns = [column[0] for column in cursor.description]
+    schema = pa.schema([(name, arrow_types.get(column_types.get(name), pa.string())) for name in columns])
+    convert = [converters.get(column_types.get(name), lambda v: None if v is None else str(v)) for name in columns]
+    
+    count = 0
+    writer = pq.ParquetWriter(stream, schema)
+    try:
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            # One row group per chunk
+            arrays = [pa.array([convert[i](row[i]) for row in rows], type=schema.field(i).type) for i in range(len(columns))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    finally:
+        writer.close()
+    return count
+
+def prune_exports(max_age=EXPORT_RETENTION_SECONDS):
+    """Delete export archives older than max_age seconds."""
+    cutoff = time.time() - max_age
+    for path in EXPORTS_DIR.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            continue
+
+@traced("export.build_archive")
+def build_export_archive(search_term="", employee_ids=None, data_format="CSV", progress_callback=None):
+    """
+    Write a ZIP of offer letters and candidate rows to EXPORTS_DIR
+    
+    Letters are copied into the archive one file at a time and candidate rows
+    (the EXPORT_COLUMNS, never credentials) are written from a chunked cursor,
+    so memory use stays flat however many letters are exported.
+    
+    Args:
+        search_term (str): Export candidates matching this full-text search (all if empty);
+                           letters without an owner are included when their name matches
+        employee_ids (list, optional): Export exactly these candidates and their letters instead
+        data_format (str): "CSV" or "Parquet" for the candidate data
+        progress_callback (callable, optional): Called as (done, total) after each letter
+        
+    Returns:
+        tuple: (archive_path, letter_count, row_count)
+    """
+    prune_exports()
+    where, params = _export_scope(search_term, employee_ids)
+    letter_where, letter_params = _export_letter_scope(search_term, employee_ids)
+    archive_path = EXPORTS_DIR / f"offer_letters_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.zip"
+    tmp_path = archive_path.with_name(f"{archive_path.name}.tmp")
+    letters_query = f"""
+        FROM documents d LEFT JOIN employees e ON e.id = d.employee_id
+        WHERE d.category = ? AND {letter_where}
+    """
+    letter_count = row_count = 0
+    
+    try:
+        with get_connection() as conn, zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            letters_params = [OFFER_LETTER_CATEGORY] + letter_params
+            total = conn.execute(f"SELECT COUNT(*) {letters_query}", letters_params).fetchone()[0]
+            for done, row in enumerate(conn.execute(f"SELECT d.file_path {letters_query} ORDER BY d.upload_date", letters_params), 1):
+                path = Path(row["file_path"])
+                if path.exists():
+                    # PDFs are already compressed; store them as-is
+                    archive.write(path, f"offer_letters/{path.name}", compress_type=zipfile.ZIP_STORED)
+                    letter_count += 1
+                if progress_callback:
+                    progress_callback(done, total)
+            
+            columns = ", ".join(f"e.{column}" for column in EXPORT_COLUMNS)
+            cursor = conn.execute(f"SELECT {columns} FROM employees e WHERE {where} ORDER BY e.rowid", params)
+            if data_format == "Parquet":
+                column_types = {row["name"]: row["type"].upper() for row in conn.execute("PRAGMA table_info(employees)")}
+                with archive.open("candidates.parquet", "w") as stream:
+                    row_count = _write_employees_parquet(stream, cursor, column_types)
+            else:
+                with archive.open("candidates.csv", "w") as stream:
+                    row_count = _write_employees_csv(stream, cursor)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    os.replace(tmp_path, archive_path)
+    return archive_path, letter_count, row_count
+
+# Offer letter render cache limits
+PDF_CACHE_MEMORY_ITEMS = 64
+PDF_CACHE_DISK_BYTES = 256 * 1024 * 1024
+
+class OfferLetterCache:
+    """
+    Two-tier LRU cache of rendered offer letters keyed by content hash.
     
-    # For any other characters not in latin-1, replace with closest ASCII equivalent or remove
-    return text.encode('latin-1', errors='replace').decode('latin-1')
+    Recent letters stay in memory; everything else lives as ``<key>.pdf``
+    under the cache directory, where file mtimes track recency so the
+    oldest files are evicted once the directory exceeds its byte budget.
+    """
+
+    def __init__(self, cache_dir, max_memory_items=PDF_CACHE_MEMORY_ITEMS, max_disk_bytes=PDF_CACHE_DISK_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._written = {}  # document path -> key of the bytes last written there
+
+    def _disk_path(self, key):
+        return self.cache_dir / f"{key}.pdf"
+
+    def _remember(self, key, pdf_bytes):
+        self._memory[key] = pdf_bytes
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        
+        disk_path = self._disk_path(key)
+        try:
+            pdf_bytes = disk_path.read_bytes()
+            os.utime(disk_path)  # Mark as recently used
+        except OSError:
+            return None
+        with self._lock:
+            self._remember(key, pdf_bytes)
+        return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        with self._lock:
+            self._remember(key, pdf_bytes)
+        
+        # Write atomically so concurrent readers never see a partial file
+        tmp_path = self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+        tmp_path.write_bytes(pdf_bytes)
+        os.replace(tmp_path, self._disk_path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def store_document(self, key, pdf_bytes, file_path):
+        """
+        Write a letter to its document path unless those exact bytes are already there.
+        
+        Returns:
+            bool: True if the file was (re)written
+        """
+        file_path = Path(file_path)
+        with self._lock:
+            unchanged = self._written.get(file_path) == key and file_path.exists()
+        if not unchanged:
+            # Not written by this process yet: compare with what is on disk before replacing it
+            try:
+                unchanged = file_path.read_bytes() == pdf_bytes
+            except OSError:
+                unchanged = False
+            if unchanged:
+                self.mark_written(key, file_path)
+        if not unchanged:
+            file_path.write_bytes(pdf_bytes)
+            self.mark_written(key, file_path)
+        return not unchanged
+
+    def mark_written(self, key, file_path):
+        with self._lock:
+            self._written[Path(file_path)] = key
+
+@st.cache_resource
+def get_offer_letter_cache():
+    """Return the offer letter cache, shared by every session in this process."""
+    return OfferLetterCache(CACHE_DIR / "offer_letters")
 
 # PDF generation function based on the attached PDF template
+@traced("pdf.generate_offer_letter")
 def generate_pdf_offer_letter(candidate_data):
-    # Create a PDF object
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    
-    # Set the font and colors
-    pdf.set_font('Arial', '', 12)
-    pdf.set_text_color(0, 0, 0)
-
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Offer Letter with AI Planet', 0, 1, 'C')
-    # Add logo at the top right corner on first page - using provided logo
-    pdf.image('logo.png', x=160, y=10, w=30) if os.path.exists('logo.png') else None
-    
-    # Add date
-    pdf.set_font('Arial', '', 12)
-    today = datetime.now().strftime("%d %B %Y")
-    pdf.cell(0, 10, f'Date: {today}', 0, 1, 'L')
-    
-    # Add candidate name and address
-    pdf.ln(10)
-    pdf.set_font('Arial', 'B', 12)
-    pdf.set_text_color(0, 0, 150)  # Blue color
-    pdf.cell(0, 10, clean_for_latin1(candidate_data["name"]), 0, 1, 'L')
-    
-    pdf.set_font('Arial', '', 12)
-    pdf.set_text_color(0, 0, 0)  # Black color
-    pdf.cell(0, 10, f'Address: {candidate_data["address"]}', 0, 1, 'L')
-    pdf.cell(0, 10, f'Email: {candidate_data["email"]}', 0, 1, 'L', )
-    
-    # Letter content
-    pdf.ln(10)
-    pdf.cell(0, 10, f'Dear {clean_for_latin1(candidate_data["name"])},', 0, 1, 'L')
-    
-    pdf.ln(5)
-    pdf.set_font('Arial', '', 12)
-    #content = f'I am delighted & excited to welcome you to AI Planet as a {clean_for_latin1(candidate_data["position"])}. At AI Planet, we believe that our team is our biggest strength and we are looking forward to strengthening it further with your addition. We are confident that you would play a significant role in the overall success of the community that we envision to build and wish you the most enjoyable, learning packed and truly meaningful experience with AI Planet.'
-    #pdf.multi_cell(0, 6, clean_for_latin1(content))
-    pdf.set_font('Arial', '', 12); pdf.write(6, clean_for_latin1('I am delighted & excited to welcome you to AI Planet as a ')); pdf.set_font('Arial', 'B', 12); pdf.write(6, clean_for_latin1(candidate_data["position"])); pdf.set_font('Arial', '', 12); pdf.write(6, clean_for_latin1('. At AI Planet, we believe that our team is our biggest strength and we are looking forward to strengthening it further with your addition. We are confident that you would play a significant role in the overall success of the community that we envision to build and wish you the most enjoyable, learning packed and truly meaningful experience with AI Planet.'))
-    pdf.ln(10)
-    pdf.write(6, 'Your appointment will be governed by the terms and conditions presented in ');  pdf.set_font('Arial', 'B', 12) ;pdf.write(6, 'Annexure A.') ;pdf.set_font('Arial', '', 12); 
-    
-    pdf.ln(10)
-    pdf.multi_cell(0, 6, 'We look forward to you joining us. Please do not hesitate to call us for any information you may need. Also, please sign the duplicate of this offer as your acceptance and forward the same to us.')
-    
-    pdf.ln(10)
-    pdf.cell(0, 10, 'Congratulations!', 0, 1, 'L')
-    
-    pdf.image('chanukya-sign.png') if os.path.exists('chanukya-sign.png') else None
-    pdf.cell(0, 10, 'Chanukya Patnaik', 0, 1, 'L')
-    pdf.cell(0, 6, 'Founder, AI Planet (DPhi)', 0, 1, 'L')
-    
-    # Company footer
-    pdf.ln(40)
-    pdf.set_font('Arial', '', 11)
-    pdf.multi_cell(0, 5, clean_for_latin1(f'{COMPANY_INFO["legal_name"]} | {COMPANY_INFO["address"]}'))
-    
-    # Annexure A - Page 2
-    pdf.add_page()
-
-    #pdf.set_font('Arial', 'Offer letter with AI Planet', 12)
-    # Add logo at the top right corner on second page
-    pdf.image('logo.png', x=160, y=10, w=30) if os.path.exists('logo.png') else None
-    
-    pdf.set_font('Arial', 'B', 14)
-    pdf.set_text_color(0, 0, 150)  # Blue colordata\logo.png
-    pdf.cell(0, 15, 'Annexure A', 0, 1, 'L')
-    
-    pdf.set_font('Arial', '', 12)
-    pdf.set_text_color(0, 0, 0)  # Black color
-    pdf.multi_cell(0, 6, 'You shall be governed by the following terms and conditions of service during your engagement with AI Planet, and those may be amended from time to time.')
-    
-    pdf.ln(5)
-    # Numbered points - clean each point for latin1 encoding
-    points = [
-        f'You will be working with AI Planet as a {clean_for_latin1(candidate_data["position"])}. You would be responsible for aspects related to conducting market research to identify trends and AI use cases, support the sales team by qualifying leads, preparing tailored presentations, and building strong customer relationships. Additionally, you will be playing an important role in realizing the design, planning, development, and deployment platforms/solutions. Further, it may also require you to do various roles and go that extra mile in the best interest of the product.',
-        f'Your date of joining is {clean_for_latin1(candidate_data["start_date"])}. During your employment, we expected to devote your time and efforts solely to AI Planet work. You are also required to let your mentor know about forthcoming events (if there are any) in advance so that your work can be planned accordingly.',
-        f'You will be working onsite in our Hyderabad office on all working days. There will be catch ups scheduled with your mentor to discuss work progress and overall work experience at regular intervals.',
-        f'All the work that you will produce at or in relation to AI Planet will be the intellectual property of AI Planet. You are not allowed to store, copy, sell, share, and distribute it to a third party under any circumstances. Similarly, you are expected to refrain from talking about your work in public domains (both online such as blogging, social networking sites and offline among your friends, college etc.) without prior discussion and approval with your mentor.',
-        f'We take data privacy and security very seriously and to maintain confidentiality of any students, customers, clients, and companies\' data and contact details that you may get access to during your engagement will be your responsibility. AI Planet operates on zero tolerance principle with regards to any breach of data security guidelines. At the completion of the engagement, you are expected to hand over all AI Planet work/data stored on your Personal Computer to your mentor and delete the same from your machine.',
-        f'Under normal circumstances either the company or you may terminate this association by providing a notice of 30 days without assigning any reason. However, the company may terminate this agreement forthwith under situations of in-disciplinary behaviors.',
-        f'During the appointment period you shall not engage yourselves directly or indirectly or in any capacity in any other organization (other than your college).'
-        f'You are expected to conduct yourself with utmost professionalism in dealing with your mentor, team members, colleagues, clients and customers and treat everyone with due respect.',
-        
-    ]
+    """
+    Render a candidate's offer letter and store it in DOCUMENTS_DIR
     
-    # Process each point to ensure it's clean for latin1 encoding
-    points = [clean_for_latin1(point) for point in points]
-    # Process each point to ensure it's clean for latin1 encoding and properly format bold text
-    pdf.ln(5)
-    for i, point in enumerate(points, 1):
-        if i > 7:  # Add remaining points to page 3
-            break
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(8, 6, f'{i}.', 0, 0)
-        pdf.set_font('Arial', '', 12)
-        x = pdf.get_x()
-        y = pdf.get_y()
-        pdf.multi_cell(180, 6, point)
-        pdf.ln(5)
-    
-    # Company footer
-    pdf.ln(10)
-    pdf.set_font('Arial', '', 11)
-    pdf.multi_cell(0, 5, clean_for_latin1(f'{COMPANY_INFO["legal_name"]} | {COMPANY_INFO["address"]}'))
-    
-    # Page 3 with remaining points
-    pdf.add_page()
-    
-    
-    # Add logo at the top right corner on third page
-    pdf.image('logo.png', x=160, y=10, w=30) if os.path.exists('logo.png') else None
-    pdf.ln(15)
-    # Continue with remaining points
-    for i, point in enumerate(points[8:], 8):
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(8, 6, f'{i}.', 12, 12)
-        pdf.set_font('Arial', '', 12)
-        x = pdf.get_x()
-        y = pdf.get_y()
-        pdf.multi_cell(180, 6, point)
-        pdf.ln(5)
-    
-    # Additional points
-    extra_points = [
-        f'AI Planet is a start-up and we love people who like to go beyond the normal call of duty and can think out of the box. Surprise us with your passion, intelligence, creativity, and hard work – and expect appreciation & rewards to follow.',
-        f'Expect constant and continuous objective feedback from your mentor and other team members and we encourage you to ask for and provide feedback at every possible opportunity. It is your right to receive and give feedback – this is the ONLY way we all can continuously push ourselves to do better.',
-        f'Have fun at what you do and do the right thing – both the principles are core of what AI Planet stands for and we expect you to imbibe them in your day to day actions and continuously challenge us if we are falling short of expectations on either of them.',
-        f'You will be provided INR {clean_for_latin1(candidate_data["annual_salary"])} /- per month as a salary. Post three months you will be considered for ESOPs. ESOPs are based on a four-year vesting schedule with a one-year cliff.'
-    ]
+    Unchanged letters are served from the render cache, so repeat views cost
+    no rendering and no rewrite of the stored file.
     
-    # Process each extra point to ensure it's clean for latin1 encoding
-    extra_points = [clean_for_latin1(point) for point in extra_points]
-    
-    for i, point in enumerate(extra_points, len(points) + 1):
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(8, 6, f'{i}.', 0, 0)
-        pdf.set_font('Arial', '', 12)
-        x = pdf.get_x()
-        y = pdf.get_y()
-        pdf.multi_cell(180, 6, point)
-        pdf.ln(5)
-    
-    # Signature section
-    pdf.ln(5)
-    pdf.set_font('Arial', '', 12)
-    pdf.multi_cell(0, 6, 'I have negotiated, agreed, read and understood all the terms and conditions of this engagement letter as well as Annexure hereto and affix my signature in complete acceptance of the terms of the letter.')
-    
-    pdf.ln(10)
-    pdf.cell(50, 10, 'Date: ________________', 0, 0, 'L')
-    pdf.cell(0, 10, 'Signature: ________________', 0, 1, 'L')
-    
-    pdf.ln(5)
-    pdf.cell(50, 10, 'Place: ________________', 0, 0, 'L')
-    pdf.cell(0, 10, 'Name: ________________', 0, 1, 'L')
-    
-    # Company footer
-    pdf.ln(90)
-    pdf.set_font('Arial', '', 11)
-    pdf.multi_cell(0, 5, clean_for_latin1(f'{COMPANY_INFO["legal_name"]} | {COMPANY_INFO["address"]}'))
-    sanitized_name = re.sub(r'[^\w\s-]', '', candidate_data["name"]).strip().replace(' ', '_')
-    today_str = datetime.now().strftime("%Y%m%d")
-    filename = f"{sanitized_name}_{today_str}_offer_letter.pdf"
+    Args:
+        candidate_data (dict): Employee data used in the letter
+        
+    Returns:
+        tuple: (pdf_bytes, file_path) with the raw PDF and where it was saved
+    """
+    cache = get_offer_letter_cache()
+    key = offer_letter_fingerprint(candidate_data, COMPANY_INFO)
+    pdf_bytes = cache.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = render_offer_letter(candidate_data, COMPANY_INFO)
+        cache.put(key, pdf_bytes)
+    
+    filename = offer_letter_filename(candidate_data)
     
     # Define the full file path
     file_path = DOCUMENTS_DIR / filename
     
-    # Save the PDF to the file
-    pdf.output(str(file_path))
+    # Record the letter on the candidate so search can find it by filename
+    candidate_data["offer_letter_file"] = filename
     
-    # Also return the PDF as base64 string for display in the web app
+    # Save the same bytes the app displays and attaches, indexing new files for the gallery
+    if cache.store_document(key, pdf_bytes, file_path):
+        register_offer_letter(candidate_data, file_path)
     
-    # Return PDF as base64 string
-    return base64.b64encode(pdf.output(dest='S').encode('latin1')).decode('utf-8')
+    return pdf_bytes, file_path
 
-# Alternative email sending function using API instead of SMTP 
-def send_email(to_email, subject, content, attachments=None, pdf_content=None, sender_name=None):
-    try:
+# Letter file server. It is only started when LETTER_SERVER_URL is set to the
+# address browsers reach it on: http://localhost:8502 when the browser runs on
+# the same machine (or the port is forwarded, as in the devcontainer), or the
+# https:// route of a reverse proxy to LETTER_SERVER_PORT when the app itself
+# is served over HTTPS, since browsers block http:// frames on https:// pages.
+# Set LETTER_SERVER_HOST=0.0.0.0 for a proxy on another host. Without a URL,
+# letters are embedded from Streamlit's media endpoint on the app's own origin
+# and exports are delivered through st.download_button.
+LETTER_SERVER_HOST = os.environ.get("LETTER_SERVER_HOST", "127.0.0.1")
+LETTER_SERVER_PORT = int(os.environ.get("LETTER_SERVER_PORT", "8502"))
+LETTER_SERVER_URL = os.environ.get("LETTER_SERVER_URL")
+
+@st.cache_resource
+def get_letter_server():
+    """
+    Start the signed-URL server for stored letters and exports, once per server process
+    
+    Returns:
+        LetterServer: The running server, or None when LETTER_SERVER_URL is not configured
+    """
+    if not LETTER_SERVER_URL:
+        return None
+    from letter_server import LetterServer
+    
+    server = LetterServer(
+        {"letters": DOCUMENTS_DIR, "exports": EXPORTS_DIR},
+        LETTER_SERVER_HOST,
+        LETTER_SERVER_PORT,
+        public_url=LETTER_SERVER_URL
+    )
+    server.start()
+    atexit.register(server.stop)
+    return server
+
+@st.cache_resource
+def get_preview_renderer():
+    """Start the background page-preview renderer, once per server process."""
+    renderer = PreviewRenderer().start()
+    atexit.register(renderer.stop)
+    return renderer
 
-        # This would be implemented with a real API in production
-        # Example implementation with SendGrid or Mailgun would go here
-        # Set up the SMTP server
-        smtp_server = "smtp.gmail.com"
-        smtp_port = 587
-        sender_email = "lukkashivacharan@gmail.com"
-        sender_password = "trgy ujlb zbdz bupo"  # Replace with your email password or app-specific password
-
-        # Create the email message
-        msg = MIMEMultipart()
-        msg["From"] = sender_email
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(content, "plain"))
-        #st.info("alsdkfjasldfkj")
-
-        # Attach the PDF if provided
-        if pdf_content:
-            attachment = MIMEApplication(base64.b64decode(pdf_content), _subtype="pdf")
-            attachment.add_header("Content-Disposition", "attachment", filename="offer_letter.pdf")
-            msg.attach(attachment)
-
-        # Send the email
+def letter_previews(file_path):
+    """
+    Page previews for a stored letter, queueing a render if they are not ready yet
+    
+    Returns:
+        list: Preview image paths in page order (empty while rendering), or
+              None if this version of the letter could not be rendered
+    """
+    previews = existing_previews(file_path)
+    if previews or not Path(file_path).exists():
+        return previews
+    if preview_failed(file_path):
+        return None
+    get_preview_renderer().submit(file_path)
+    return previews
+
+@st.cache_resource
+def get_pdf_executor():
+    """
+    Process pool for bulk offer letter rendering, one worker per available core.
+    
+    Workers only import offer_letter_pdf, which has no Streamlit state, so
+    they are started from a forkserver rather than forked from this process:
+    forking a multithreaded server (tornado loop, outbox worker, preview
+    renderer, letter server) can leave children holding copies of locks
+    that no thread will ever release.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if hasattr(os, "sched_getaffinity"):
+        workers = len(os.sched_getaffinity(0))
+    else:
+        workers = os.cpu_count() or 1
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver":
+        # Workers forked from the server start with the renderer already imported
+        context.set_forkserver_preload(["offer_letter_pdf"])
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+@traced("pdf.generate_bulk")
+def generate_offer_letters_bulk(employee_ids, progress_callback=None):
+    """
+    Render offer letters for many candidates in parallel worker processes
+    
+    Args:
+        employee_ids (list): Candidates to generate letters for
+        progress_callback (callable, optional): Called as (done, total, employee) after each letter
+        
+    Returns:
+        tuple: (generated, failures) where generated maps employee id to file path
+               and failures lists (employee, error message)
+    """
+    from concurrent.futures import as_completed
+    
+    employees = get_employees_by_ids(employee_ids)
+    executor = get_pdf_executor()
+    
+    cache = get_offer_letter_cache()
+    generated, failures = {}, []
+    futures = {}
+    for employee in employees:
+        filename = offer_letter_filename(employee)
+        file_path = DOCUMENTS_DIR / filename
+        key = offer_letter_fingerprint(employee, COMPANY_INFO)
+        
+        # Unchanged letters come straight from the render cache
+        pdf_bytes = cache.get(key)
+        if pdf_bytes is not None:
+            if cache.store_document(key, pdf_bytes, file_path):
+                register_offer_letter(employee, file_path)
+            generated[employee["id"]] = str(file_path)
+            continue
+        
+        future = executor.submit(write_offer_letter, employee, COMPANY_INFO, str(file_path))
+        futures[future] = (employee, key)
+    
+    done = len(generated)
+    total = len(employees)
+    for future in as_completed(futures):
+        employee, key = futures[future]
         try:
-            with open("sldfkj.txt", "w") as f:
-                f.write("sldfjasldkjf")
-            with smtplib.SMTP(smtp_server, smtp_port) as server:    
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.send_message(msg)
-                
-                with open("sldfkj.txt", "w") as f:
-                    f.write("Email sent successfully")
-                
+            file_path = future.result()
+            generated[employee["id"]] = file_path
+            cache.put(key, Path(file_path).read_bytes())
+            cache.mark_written(key, file_path)
+            register_offer_letter(employee, file_path)
         except Exception as e:
-            #st.info("lsdjaf;lsdkfj")
-            st.error(str(e))
-            with open("sldfkj.txt", "w") as f:
-                f.write(f"Email not sent successfully {str(e)}")
+            failures.append((employee, str(e)))
+        done += 1
+        if progress_callback:
+            progress_callback(done, total, employee)
+    
+    # Record every new letter on its candidate in one transaction
+    if generated:
+        with get_connection() as conn:
+            conn.executemany(
+                "UPDATE employees SET offer_letter_file = ? WHERE id = ?",
+                [(Path(path).name, employee_id) for employee_id, path in generated.items()]
+            )
+    
+    return generated, failures
 
-        st.success(f"✅ Email successfully sent to {to_email} via SMTP!")
+# SMTP settings, overridable through the environment (e.g. to point at a local mail sink)
+SMTP_SERVER = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.environ.get("SMTP_USE_TLS", "1") != "0"
+SMTP_TIMEOUT = 30
+SENDER_EMAIL = os.environ.get("SENDER_EMAIL", "lukkashivacharan@gmail.com")
+SENDER_PASSWORD = os.environ.get("SENDER_PASSWORD", "trgy ujlb zbdz bupo")  # Replace with your email password or app-specific password
+
+# Outbox delivery settings
+OUTBOX_POLL_SECONDS = 5
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_BACKOFF_SECONDS = 30
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+OUTBOX_STATUSES = ["queued", "sending", "sent", "failed"]
+# A claim older than this is assumed abandoned by a crashed process and retried
+OUTBOX_CLAIM_LEASE_SECONDS = 15 * 60
+OUTBOX_FAILED_LIMIT = 50
+
+def build_email_message(message):
+    """Build the MIME message for an outbox row."""
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.utils import formataddr
+    
+    msg = MIMEMultipart()
+    msg["From"] = formataddr((message["sender_name"], SENDER_EMAIL)) if message.get("sender_name") else SENDER_EMAIL
+    msg["To"] = message["to_email"]
+    msg["Subject"] = message["subject"]
+    msg.attach(MIMEText(message["body"], message.get("body_type") or "plain"))
+    
+    # Attach the PDF if provided
+    if message.get("attachment"):
+        attachment = MIMEApplication(message["attachment"], _subtype="pdf")
+        attachment.add_header("Content-Disposition", "attachment", filename=message.get("attachment_name") or "offer_letter.pdf")
+        msg.attach(attachment)
+    return msg
+
+@st.cache_resource
+def get_smtp_pool():
+    """Return the pool of authenticated SMTP sessions, shared by the whole process."""
+    from smtp_pool import SMTPSessionPool
+    
+    pool = SMTPSessionPool(
+        SMTP_SERVER,
+        SMTP_PORT,
+        use_tls=SMTP_USE_TLS,
+        username=SENDER_EMAIL,
+        password=SENDER_PASSWORD,
+        timeout=SMTP_TIMEOUT
+    )
+    atexit.register(pool.close)
+    return pool
+
+def deliver_emails(messages):
+    """
+    Send outbox messages over one pooled SMTP session
+    
+    Returns:
+        list: None for each delivered message, or the exception that stopped it
+    """
+    return get_smtp_pool().send_batch([build_email_message(message) for message in messages])
+
+def enqueue_email(to_email, subject, body, body_type="plain", attachment=None, attachment_name=None,
+                  sender_name=None, employee_id=None):
+    """
+    Add a message to the persistent outbox and wake the delivery worker
+    
+    Returns:
+        str: The outbox message id
+    """
+    message_id = str(uuid.uuid4())
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        conn.execute('''
+            INSERT INTO email_outbox (id, to_email, sender_name, subject, body, body_type, attachment,
+                                      attachment_name, employee_id, status, next_attempt_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+        ''', (message_id, to_email, sender_name, subject, body, body_type, attachment,
+              attachment_name, employee_id, now, now))
+    get_outbox_worker().wake()
+    return message_id
+
+# Employee columns owned by mark_offers_sent once an offer email is queued
+OFFER_STATUS_FIELDS = ("offer_sent", "offer_sent_date", "offer_accepted", "onboarding_completed", "status")
+
+def mark_offers_sent(conn, deliveries):
+    """
+    Record delivered offer emails on their candidates
+    
+    Args:
+        conn (sqlite3.Connection): Connection inside the outbox update's transaction
+        deliveries (list): (employee_id, delivered_at) for each delivered offer email
+    """
+    # Mirrors employee_status: accepted and onboarded candidates keep their later status
+    conn.executemany("""
+        UPDATE employees SET
+            offer_sent = 1,
+            offer_sent_date = substr(?1, 1, 10),
+            status = CASE
+                WHEN COALESCE(onboarding_completed, 0) != 0 OR COALESCE(offer_accepted, 0) != 0 THEN status
+                ELSE 'Offer Sent'
+            END,
+            updated_at = ?1
+        WHERE id = ?2
+    """, [(delivered_at, employee_id) for employee_id, delivered_at in deliveries])
+
+class OutboxWorker:
+    """
+    Background thread that drains the email outbox.
+    
+    Each message is claimed under a write lock and stamped with claimed_at,
+    so several server processes can share one outbox; a claim older than
+    OUTBOX_CLAIM_LEASE_SECONDS belongs to a process that died mid-send and
+    is taken over. Failed sends are retried with exponential backoff until
+    OUTBOX_MAX_ATTEMPTS, after which the message is marked failed. When an
+    offer email (one with an employee_id) is delivered, on_delivered records
+    it on the candidate in the same transaction.
+    """
+
+    def __init__(self, pool, deliver=deliver_emails, on_delivered=mark_offers_sent,
+                 poll_interval=OUTBOX_POLL_SECONDS, batch_size=OUTBOX_BATCH_SIZE, lease_seconds=OUTBOX_CLAIM_LEASE_SECONDS):
+        self.pool = pool
+        self.deliver = deliver
+        self.on_delivered = on_delivered
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"Email outbox worker error: {e}")
+                processed = False
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self):
+        now = datetime.now()
+        claimed_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        stale_before = (now - timedelta(seconds=self.lease_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Due messages, plus claims another (crashed) process never finished;
+            # those may already have gone out, so delivery is at least once
+            rows = conn.execute(
+                "SELECT * FROM email_outbox "
+                "WHERE (status = 'queued' AND next_attempt_at <= ?) "
+                "OR (status = 'sending' AND COALESCE(claimed_at, '') < ?) "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (claimed_at, stale_before, self.batch_size)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                [(claimed_at, row["id"]) for row in rows]
+            )
+        return [dict(row) for row in rows]
+
+    def run_once(self):
+        """Deliver the next batch of due messages. Returns True if any were processed."""
+        messages = self._claim()
+        if not messages:
+            return False
+        
+        try:
+            results = self.deliver(messages)
+        except Exception as e:
+            results = [e] * len(messages)
+        
+        now = datetime.now()
+        delivered_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        sent, retries, offers = [], [], []
+        for message, error in zip(messages, results):
+            attempts = message["attempts"] + 1
+            if error is None:
+                sent.append((attempts, delivered_at, message["id"]))
+                if message.get("employee_id"):
+                    offers.append((message["employee_id"], delivered_at))
+                continue
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                status, delay = "failed", 0
+            else:
+                status = "queued"
+                delay = min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF_SECONDS)
+            next_attempt = (now + timedelta(seconds=delay)).strftime("%Y-%m-%d %H:%M:%S")
+            retries.append((status, attempts, next_attempt, str(error), message["id"]))
         
-        # For demonstration purposes, simulate success
-        st.success(f"✅ Email successfully sent to {to_email} via email API!")
+        with self.pool.connection() as conn:
+            # The attachment is only needed until the message is delivered
+            conn.executemany(
+                "UPDATE email_outbox SET status = 'sent', attempts = ?, sent_at = ?, last_error = NULL, "
+                "attachment = NULL, claimed_at = NULL WHERE id = ?",
+                sent
+            )
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+                "claimed_at = NULL WHERE id = ?",
+                retries
+            )
+            if offers and self.on_delivered:
+                self.on_delivered(conn, offers)
+        return True
+
+@st.cache_resource
+def get_outbox_worker():
+    """Start the email delivery worker once per server process."""
+    worker = OutboxWorker(get_db_pool()).start()
+    atexit.register(worker.stop, 5)
+    return worker
+
+@traced("db.get_outbox_summary")
+def get_outbox_summary(limit=20):
+    """
+    Delivery state of the outbox for the dashboard
+    
+    Returns:
+        tuple: (counts by status, most recent messages without their attachments,
+                failed messages with the candidate each offer email was for)
+    """
+    with get_connection() as conn:
+        counts = dict.fromkeys(OUTBOX_STATUSES, 0)
+        counts.update({row["status"]: row["n"] for row in conn.execute(
+            "SELECT status, COUNT(*) AS n FROM email_outbox GROUP BY status"
+        )})
+        recent = conn.execute(
+            "SELECT o.to_email, e.name AS candidate, o.subject, o.status, o.attempts, o.last_error, o.created_at, o.sent_at "
+            "FROM email_outbox o LEFT JOIN employees e ON e.id = o.employee_id "
+            "ORDER BY o.created_at DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        failed = conn.execute(
+            "SELECT o.id, e.name AS candidate, o.to_email, o.subject, o.attempts, o.last_error, o.created_at "
+            "FROM email_outbox o LEFT JOIN employees e ON e.id = o.employee_id "
+            "WHERE o.status = 'failed' ORDER BY o.created_at DESC LIMIT ?",
+            (OUTBOX_FAILED_LIMIT,)
+        ).fetchall()
+    return counts, [dict(row) for row in recent], [dict(row) for row in failed]
+
+def retry_failed_emails(message_ids):
+    """Put failed outbox messages back in the queue with a fresh set of attempts."""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        conn.executemany(
+            "UPDATE email_outbox SET status = 'queued', attempts = 0, next_attempt_at = ?, last_error = NULL "
+            "WHERE id = ? AND status = 'failed'",
+            [(now, message_id) for message_id in message_ids]
+        )
+    get_outbox_worker().wake()
+
+# Queue an email for background delivery through the outbox
+@traced("email.send")
+def send_email(to_email, subject, content, attachments=None, pdf_content=None, sender_name=None, employee_id=None):
+    try:
+        enqueue_email(
+            to_email,
+            subject,
+            content,
+            attachment=pdf_content,
+            attachment_name="offer_letter.pdf" if pdf_content else None,
+            sender_name=sender_name,
+            employee_id=employee_id
+        )
+        if employee_id:
+            st.success(f"✅ Offer email to {to_email} queued; the candidate is marked Offer Sent once it is delivered")
+        else:
+            st.success(f"✅ Email to {to_email} queued for delivery")
         return True
     
     except Exception as e:
-        st.error(f"Failed to prepare email: {str(e)}")
+        st.error(f"Failed to queue email: {str(e)}")
         return False
 
+# Non-urgent notifications for the same recipient and priority within this many
+# seconds are combined into a single digest email. This is the default; a window
+# saved on the Settings page takes precedence.
+NOTIFICATION_DIGEST_WINDOW = 120
+
+def render_notification_html(message, priority="normal"):
+    """Wrap a notification message in the branded HTML email layout."""
+    return f"""
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+            .header {{ padding: 10px 0; border-bottom: 1px solid #eee; }}
+            .logo {{ font-size: 24px; font-weight: bold; color: #2E5090; }}
+            .content {{ padding: 20px 0; }}
+            .footer {{ padding: 10px 0; border-top: 1px solid #eee; font-size: 12px; color: #777; }}
+            {'.' if priority == "normal" else '.alert { padding: 15px; margin-bottom: 20px; border-radius: 4px;}'}
+            {'.' if priority == "normal" else '.urgent { background-color: #f8d7da; border: 1px solid #f5c6cb; color: #721c24; }'}
+            {'.' if priority == "normal" else '.high { background-color: #fff3cd; border: 1px solid #ffeeba; color: #856404; }'}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <div class="logo">AI Planet</div>
+            </div>
+            <div class="content">
+                {"" if priority == "normal" else f'<div class="alert {"urgent" if priority == "urgent" else "high"}">This is a {"urgent" if priority == "urgent" else "high priority"} notification.</div>'}
+                {message}
+            </div>
+            <div class="footer">
+                <p>This is an automated message from AI Planet Onboarding System.</p>
+                <p>© {datetime.now().year} AI Planet. All rights reserved.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+def render_digest_message(items):
+    """Combine buffered (subject, message) notifications into one digest body."""
+    sections = "".join(
+        f'<div style="border-top: 1px solid #eee; padding-top: 10px;"><h3>{subject}</h3>{message}</div>'
+        for subject, message in items
+    )
+    return f"<h2>Onboarding Digest</h2><p>{len(items)} notifications since the last update.</p>{sections}"
+
+class NotificationCoalescer:
+    """
+    Buffers notifications per (recipient, priority) and sends one email per window.
+    
+    A bucket's window opens with its first notification; when it closes the
+    bucket is sent as-is if it holds a single item, or as a digest otherwise.
+    """
+
+    def __init__(self, send, window=NOTIFICATION_DIGEST_WINDOW):
+        self.send = send
+        self.window = window
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notification-digest", daemon=True)
+        self._thread.start()
+
+    def add(self, recipient, priority, subject, message):
+        with self._lock:
+            bucket = self._pending.setdefault(
+                (recipient, priority),
+                {"deadline": time.monotonic() + self.window, "items": []}
+            )
+            bucket["items"].append((subject, message))
+        self._wake.set()
+
+    def pending_count(self):
+        with self._lock:
+            return sum(len(bucket["items"]) for bucket in self._pending.values())
+
+    def flush(self, force=False):
+        """Send every bucket whose window has closed (or all of them if force)."""
+        now = time.monotonic()
+        with self._lock:
+            due = [key for key, bucket in self._pending.items() if force or bucket["deadline"] <= now]
+            buckets = [(key, self._pending.pop(key)["items"]) for key in due]
+        for (recipient, priority), items in buckets:
+            try:
+                self._send_bucket(recipient, priority, items)
+            except Exception as e:
+                print(f"Error sending notification digest: {e}")
+
+    def _send_bucket(self, recipient, priority, items):
+        if len(items) == 1:
+            subject, message = items[0]
+        else:
+            subject = f"Onboarding Digest: {len(items)} notifications"
+            if priority == "high":
+                subject = f"HIGH PRIORITY: {subject}"
+            message = render_digest_message(items)
+        self.send(recipient, subject, render_notification_html(message, priority))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                deadlines = [bucket["deadline"] for bucket in self._pending.values()]
+            timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+            self.flush()
+
+@st.cache_resource
+def get_notification_coalescer():
+    """Return the process-wide notification coalescer, using the saved digest window."""
+    coalescer = NotificationCoalescer(
+        lambda recipient, subject, html: enqueue_email(recipient, subject, html, body_type="html"),
+        window=int(get_app_setting("notification_digest_window", NOTIFICATION_DIGEST_WINDOW))
+    )
+    atexit.register(coalescer.flush, True)
+    return coalescer
+
 # Function to send notification emails with API instead of SMTP
-def send_notification_email(subject, message, recipient=None, priority="normal"):
+@traced("email.send_notification")
+def send_notification_email(subject, message, recipient=None, priority="normal", coalesce=True):
     """
-    Send notification emails to specified recipients or default notification email
-    using API instead of SMTP
+    Send notification emails to specified recipients or default notification email.
+    Urgent notifications are queued at once; others are buffered per recipient and
+    priority and sent as one digest per NOTIFICATION_DIGEST_WINDOW.
     
     Args:
         subject (str): Email subject
         message (str): Email message content
         recipient (str, optional): Email recipient. If None, uses notification_email from session state
         priority (str): Email priority (normal, high, urgent)
+        coalesce (bool): Set False to queue a non-urgent notification immediately
     
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -550,53 +2197,15 @@ def send_notification_email(subject, message, recipient=None, priority="normal")
         elif priority == "high":
             subject = f"HIGH PRIORITY: {subject}"
             
-        # Create HTML email content with appropriate styling based on priority
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ padding: 10px 0; border-bottom: 1px solid #eee; }}
-                .logo {{ font-size: 24px; font-weight: bold; color: #2E5090; }}
-                .content {{ padding: 20px 0; }}
-                .footer {{ padding: 10px 0; border-top: 1px solid #eee; font-size: 12px; color: #777; }}
-                {'.' if priority == "normal" else '.alert { padding: 15px; margin-bottom: 20px; border-radius: 4px;}'}
-                {'.' if priority == "normal" else '.urgent { background-color: #f8d7da; border: 1px solid #f5c6cb; color: #721c24; }'}
-                {'.' if priority == "normal" else '.high { background-color: #fff3cd; border: 1px solid #ffeeba; color: #856404; }'}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo">AI Planet</div>
-                </div>
-                <div class="content">
-                    {"" if priority == "normal" else f'<div class="alert {"urgent" if priority == "urgent" else "high"}">This is a {"urgent" if priority == "urgent" else "high priority"} notification.</div>'}
-                    {message}
-                </div>
-                <div class="footer">
-                    <p>This is an automated message from AI Planet Onboarding System.</p>
-                    <p>© {datetime.now().year} AI Planet. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # For demonstration, log the notification in session state
-        st.session_state.notification_history.append({
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "recipient": to_email,
-            "subject": subject,
-            "message": message,
-            "priority": priority
-        })
-        
-        # Instead of SMTP, we'd implement API-based email service here
-        # Example API implementation would go here in production
+        # Store the notification; the session keeps only a small summary of recent items
+        entry = record_notification(to_email, subject, message, priority)
+        st.session_state.notification_history.append(entry)
         
-        # For demonstration, simulate success
+        # Urgent items go straight to the outbox; everything else is coalesced into digests
+        if priority == "urgent" or not coalesce:
+            enqueue_email(to_email, subject, render_notification_html(message, priority), body_type="html")
+        else:
+            get_notification_coalescer().add(to_email, priority, subject, message)
         return True
     except Exception as e:
         print(f"Error sending notification email: {e}")
@@ -626,10 +2235,9 @@ def preview_email(to_email, subject, content, pdf_content=None):
             st.markdown("**Preview of the attached PDF:**")
 
         if st.session_state.pdf_content:
-            pdf_bytes = base64.b64decode(st.session_state.pdf_content)
             st.download_button(
                 label="📄 Download Offer Letter (PDF)",
-                data=pdf_bytes,
+                data=st.session_state.pdf_content,
                 file_name="AI Planet_{candidate_name}_Offer_Letter.pdf",
                 mime="application/pdf"
             )
@@ -642,9 +2250,23 @@ def preview_email(to_email, subject, content, pdf_content=None):
         st.info("Using API-based email service with sender: lukkashivacharan@gmail.com")
     
     return True
-def show_pdf(pdf_base64):
-    b64_pdf = pdf_base64
-    pdf_display = f'<iframe src="data:application/pdf;base64,{b64_pdf}" width="700" height="1000" type="application/pdf"></iframe>'
+def show_pdf(file_path, width="700", height="1000"):
+    """
+    Embed a stored PDF by URL, so reruns only carry the link rather than the file
+    
+    With a letter server (LETTER_SERVER_URL set) the iframe loads a signed
+    link to it. Otherwise the letter is added to Streamlit's media storage
+    and loaded from the app's own origin, which works wherever the app does.
+    """
+    server = get_letter_server()
+    if server is None:
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(file_path)
+        st.iframe(file_path, width="stretch" if str(width).endswith("%") else int(width), height=int(height))
+        return
+    pdf_url = server.url_for(file_path)
+    pdf_display = f'<iframe src="{pdf_url}" width="{width}" height="{height}" type="application/pdf"></iframe>'
     st.markdown(pdf_display, unsafe_allow_html=True)
 # Custom CSS
 def load_css():
@@ -749,6 +2371,9 @@ def main():
     load_css()
     authenticate()
     
+    # Keep queued email flowing even if nobody sends anything this session
+    get_outbox_worker()
+    
     if not st.session_state.authenticated:
         st.title("Welcome to AI Planet Onboarding Agent")
         st.markdown("""
@@ -772,7 +2397,7 @@ def main():
             "Dashboard", 
             "Offer Letter Generator", 
             "Settings"
-        ])
+        ], key="nav_page")
         
         # Update the page in session state when navigation changes
         if nav_selection != st.session_state.page:
@@ -798,10 +2423,9 @@ def offer_letter_generator():
         st.subheader("Review Offer Letter")
 
         if st.session_state.pdf_content:
-            pdf_bytes = base64.b64decode(st.session_state.pdf_content)
             st.download_button(
                 label="📄 Download Offer Letter (PDF)",
-                data=pdf_bytes,
+                data=st.session_state.pdf_content,
                 file_name="Offer_Letter.pdf",
                 mime="application/pdf"
             )
@@ -877,23 +2501,24 @@ def offer_letter_generator():
                     f.write("Sending email via API service using")
                     
                 def func():
+                    # Save the (possibly edited) email before queueing. The status fields are
+                    # left out: the outbox worker sets them on delivery, which can happen
+                    # before this callback returns, and this dict still holds the old values
+                    candidate_data["email"] = edited_email
+                    save_employee({key: value for key, value in candidate_data.items() if key not in OFFER_STATUS_FIELDS})
+                    
                     if send_email(
                         to_email=edited_email, 
                         subject=edited_subject, 
                         content=edited_content,
                         pdf_content=st.session_state.pdf_content,
-                        sender_name=candidate_data["hr_name"]
+                        sender_name=candidate_data["hr_name"],
+                        employee_id=candidate_data["id"]
                     ):
-                        # Update the candidate data
-                        candidate_data["email"] = edited_email  # Update email if changed
-                        candidate_data["offer_sent"] = True
-                        candidate_data["offer_sent_date"] = datetime.now().strftime("%Y-%m-%d")
-                        save_employee(candidate_data)
-                        
                         # Also send a notification about the offer letter being sent
                         notification_message = f"""
-                        <h2>Offer Letter Sent</h2>
-                        <p>An offer letter has been sent to <strong>{candidate_data['name']}</strong> for the position of {candidate_data['position']}.</p>
+                        <h2>Offer Letter Queued</h2>
+                        <p>An offer letter has been queued for delivery to <strong>{candidate_data['name']}</strong> for the position of {candidate_data['position']}.</p>
                         <p><strong>Details:</strong></p>
                         <ul>
                             <li><strong>Email:</strong> {edited_email}</li>
@@ -904,7 +2529,7 @@ def offer_letter_generator():
                         """
                         
                         send_notification_email(
-                            f"Offer Letter Sent to {candidate_data['name']}", 
+                            f"Offer Letter Queued for {candidate_data['name']}", 
                             notification_message
                         )
                         
@@ -915,7 +2540,7 @@ def offer_letter_generator():
                         st.session_state.pdf_content = None
                         
                         # Show success message and redirect
-                        st.success("Offer letter email sent successfully!")
+                        st.success("Offer letter email queued. Delivery status is shown on the dashboard.")
                         st.session_state.page = "Dashboard"
 
                 st.button("Send Email Now", on_click=func)
@@ -1021,7 +2646,7 @@ def offer_letter_generator():
                 st.session_state.offer_letter_data = candidate_data
                 
                 # Regenerate PDF
-                pdf_content = generate_pdf_offer_letter(candidate_data)
+                pdf_content, _ = generate_pdf_offer_letter(candidate_data)
                 st.session_state.pdf_content = pdf_content
                 
                 # Switch to preview mode
@@ -1043,6 +2668,9 @@ def offer_letter_generator():
         </div>
         """, unsafe_allow_html=True)
         
+        with st.expander("📥 Bulk Import Candidates (CSV / Excel)"):
+            bulk_import_section()
+        
         with st.form("offer_letter_form"):
             st.subheader("Candidate Information")
             
@@ -1132,7 +2760,7 @@ def offer_letter_generator():
                         send_notification_email(intervention_subject, intervention_message)
                 
                 # Generate the offer letter PDF
-                pdf_content = generate_pdf_offer_letter(candidate_data)
+                pdf_content, _ = generate_pdf_offer_letter(candidate_data)
                 
                 # Save to session state
                 st.session_state.offer_letter_data = candidate_data
@@ -1154,6 +2782,58 @@ def offer_letter_generator():
                 st.rerun()
     
                 
+# Bulk candidate import from a CSV or Excel upload
+def bulk_import_section():
+    st.markdown(
+        "Upload a CSV or XLSX file with one candidate per row. Required columns: "
+        + ", ".join(f"`{field}`" for field in IMPORT_REQUIRED_FIELDS)
+        + ". Optional columns: " + ", ".join(f"`{field}`" for field in IMPORT_DEFAULTS) + "."
+    )
+    uploaded_file = st.file_uploader("Candidate file", type=["csv", "xlsx"], key="bulk_import_file")
+    
+    if uploaded_file and st.button("Import Candidates", key="bulk_import_button"):
+        # Errors from a file that can't be parsed at all; import_employees runs in one
+        # transaction, so nothing has been imported when one of these is raised
+        parse_errors = (UnicodeDecodeError, csv.Error, zipfile.BadZipFile)
+        try:
+            from openpyxl.utils.exceptions import InvalidFileException
+            parse_errors += (InvalidFileException,)
+        except ImportError:
+            pass
+        
+        with st.spinner("Importing candidates..."):
+            try:
+                imported, error_report = import_employees(iter_import_rows(uploaded_file))
+            except ImportError:
+                st.error("Excel import requires the openpyxl package. Upload a CSV file instead.")
+                return
+            except UnicodeDecodeError:
+                st.error(f"Could not read {uploaded_file.name}: it is not UTF-8 text. Save it as \"CSV UTF-8\" and upload it again. No candidates were imported.")
+                return
+            except parse_errors as e:
+                st.error(f"Could not read {uploaded_file.name}: {e}. Check that it is a valid CSV or XLSX file. No candidates were imported.")
+                return
+        
+        if imported:
+            st.success(f"✅ Imported {imported} candidates")
+            send_notification_email(
+                f"Bulk Import: {imported} Candidates Added",
+                f"<h2>Bulk Import Completed</h2><p>{imported} candidates were imported from <strong>{uploaded_file.name}</strong>.</p>"
+            )
+        if error_report:
+            st.warning(f"⚠️ {len(error_report)} rows were skipped")
+            st.dataframe(error_report, use_container_width=True, hide_index=True)
+            report_csv = io.StringIO()
+            writer = csv.DictWriter(report_csv, fieldnames=["row", "name", "errors"])
+            writer.writeheader()
+            writer.writerows(error_report)
+            st.download_button(
+                label="📄 Download Error Report (CSV)",
+                data=report_csv.getvalue(),
+                file_name="import_errors.csv",
+                mime="text/csv"
+            )
+
 # Function to view offer letter of a specific candidate
 def view_offer_letter(employee_id):
     # Get employee data
@@ -1165,30 +2845,45 @@ def view_offer_letter(employee_id):
             st.subheader("Review Offer Letter")
 
         if st.session_state.pdf_content:
-            pdf_bytes = base64.b64decode(st.session_state.pdf_content)
             st.download_button(
                 label="📄 Download Offer Letter (PDF)",
-                data=pdf_bytes,
+                data=st.session_state.pdf_content,
                 file_name="Offer_Letter.pdf",
                 mime="application/pdf"
             )
         # Generate the PDF if not in session state
-        pdf_content = generate_pdf_offer_letter(employee)
+        stored_file = employee.get("offer_letter_file")
+        pdf_content, pdf_path = generate_pdf_offer_letter(employee)
+        
+        # A regenerated letter carries today's date; keep the row and its search index pointing at it
+        if employee["offer_letter_file"] != stored_file:
+            with get_connection() as conn:
+                conn.execute(
+                    "UPDATE employees SET offer_letter_file = ? WHERE id = ?",
+                    (employee["offer_letter_file"], employee["id"])
+                )
         
         # Display PDF preview
         if st.session_state.preview_mode:
             st.subheader("Preview Offer Letter")
             if st.session_state.pdf_content:
-                pdf_bytes = base64.b64decode(st.session_state.pdf_content)
                 st.download_button(
                     label="📄 Download Offer Letter (PDF)",
-                    data=pdf_bytes,
+                    data=st.session_state.pdf_content,
                     file_name="{employee['name']}_Offer_Letter.pdf",
                     mime="application/pdf"
                 )
 
-        #pdf_display = f'<iframe src="data:application/pdf;base64,{pdf_content}" width="100%" height="500"></iframe>'
-        #st.markdown(pdf_display, unsafe_allow_html=True)
+        # Page thumbnails load instantly; the full document follows in the viewer
+        previews = letter_previews(pdf_path)
+        if previews:
+            st.image([str(path) for path in previews], caption=[f"Page {i}" for i in range(1, len(previews) + 1)], width=PREVIEW_DISPLAY_WIDTH)
+        elif previews is None:
+            st.caption("Page previews are not available for this letter.")
+        else:
+            st.caption("Page previews are being generated…")
+        
+        show_pdf(pdf_path, width="100%", height="500")
         
         # Add option to open in Google Docs
         
@@ -1218,7 +2913,7 @@ def settings_page():
     </div>
     """, unsafe_allow_html=True)
     
-    tabs = st.tabs(["Email Templates", "Email Configuration", "System Configuration", "Notification History"])
+    tabs = st.tabs(["Email Templates", "Email Configuration", "System Configuration", "Notification History", "Performance"])
     
     with tabs[1]:
         st.subheader("Email Configuration")
@@ -1242,6 +2937,22 @@ def settings_page():
                 help="Turn on/off system email notifications"
             )
         
+        # Digest settings for non-urgent notifications
+        coalescer = get_notification_coalescer()
+        digest_window = st.number_input(
+            "Notification Digest Window (seconds)",
+            min_value=0,
+            max_value=3600,
+            value=int(coalescer.window),
+            step=30,
+            help="Non-urgent notifications to the same recipient within this window are sent as one digest. Urgent alerts are always sent immediately."
+        )
+        if st.button("Save Digest Window", disabled=digest_window == coalescer.window):
+            set_app_setting("notification_digest_window", digest_window)
+            coalescer.window = digest_window
+            st.success(f"Digest window set to {digest_window} seconds")
+        st.caption(f"{coalescer.pending_count()} notifications waiting for the next digest")
+        
         # API-based email settings
         st.subheader("Email API Settings")
         
@@ -1267,41 +2978,305 @@ def settings_page():
                     <p>This is a test email from the AI Planet Onboarding System.</p>
                     <p>If you received this email, your email configuration is working correctly.</p>
                     """,
-                    recipient=test_email
+                    recipient=test_email,
+                    coalesce=False
                 ):
                     st.success(f"✅ Test email sent to {test_email}")
                 else:
                     st.error("Failed to send test email. Please check your API settings.")
                 
+    with tabs[3]:
+        notification_history_tab()
+    
+    with tabs[4]:
+        performance_tab()
+    
+    with tabs[2]:
+        st.subheader("System Configuration")
+        st.caption(f"Database schema version {APP_RESOURCES.schema_version}")
+        if st.button(
+            "Rebuild search index",
+            key="rebuild_search_index",
+            help="Re-index every candidate for search. Use this if searches miss candidates, e.g. after restoring or vacuuming the database."
+        ):
+            with st.spinner("Rebuilding search index..."):
+                rebuild_search_index()
+            st.success("Search index rebuilt")
+        if APP_RESOURCES.missing_assets:
+            st.warning(f"Offer letter assets not found: {', '.join(APP_RESOURCES.missing_assets)}")
+        st.metric(
+            "Live Matplotlib Figures",
+            live_figure_count(),
+            help="Figures open in pyplot's registry in this server process. Dashboard charts are rendered without pyplot, so this should stay at 0."
+        )
+    
     # Other tabs implementation
 
-# Dashboard page with enhanced visualizations
-def display_dashboard():
-    st.title("Onboarding Dashboard")
+def markdown_table(rows):
+    """Render a list of dicts as a Markdown table; unlike st.dataframe this does not import pandas."""
+    columns = list(rows[0])
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "| " + " | ".join("---" for _ in columns) + " |",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(str(row[column]).replace("|", "\\|") for column in columns) + " |")
+    st.markdown("\n".join(lines))
+
+def performance_tab():
+    st.subheader("Performance")
+    if not TRACING_ENABLED:
+        st.info("Timing spans are disabled (PERF_TRACING=0).")
+        return
     
-    # Initialize viewing_employee_id in session state if not present
-    if 'viewing_employee_id' not in st.session_state:
-        st.session_state.viewing_employee_id = None
+    # Reruns that have finished in this session, newest first
+    traces = list(reversed(st.session_state.perf_traces))
+    st.markdown("**Recent reruns in this session**")
+    if traces:
+        markdown_table([
+            {
+                "Started": trace.started_at.replace("T", " "),
+                "Page": trace.label,
+                "Total (ms)": trace.total_ms,
+                "Spans": len(trace.spans),
+                "Slowest span": max(trace.spans, key=lambda item: item[2])[0] if trace.spans else "",
+            }
+            for trace in traces
+        ])
+        
+        selected = st.selectbox(
+            "Rerun",
+            range(len(traces)),
+            format_func=lambda i: f"{traces[i].started_at.replace('T', ' ')} · {traces[i].label} · {traces[i].total_ms:.1f} ms",
+            key="perf_trace_rerun"
+        )
+        trace = traces[selected]
+        markdown_table([
+            {
+                "Span": "&nbsp;&nbsp;" * depth + name,
+                "Start (ms)": round(start_ms, 2),
+                "Duration (ms)": round(duration_ms, 3),
+                "Share": f"{duration_ms / trace.total_ms:.1%}" if trace.total_ms else "",
+            }
+            for name, start_ms, duration_ms, depth in sorted(trace.spans, key=lambda item: item[1])
+        ])
+    else:
+        st.caption("No finished reruns yet.")
+    
+    # Shared by every session in this server process
+    st.markdown("**Process-wide span histogram**")
+    histogram = HISTOGRAM.snapshot()
+    if histogram:
+        markdown_table([
+            {
+                "Span": row["span"],
+                "Calls": row["count"],
+                "Total (ms)": row["total_ms"],
+                "Mean (ms)": row["mean_ms"],
+                "p50 ≤ (ms)": row["p50_ms"],
+                "p95 ≤ (ms)": row["p95_ms"],
+                "Max (ms)": row["max_ms"],
+            }
+            for row in histogram
+        ])
+        st.caption(f"Percentiles are histogram bucket bounds. '{RERUN_SPAN}' is a whole script run.")
     
-    # If viewing a specific employee, show their offer letter
-    if st.session_state.viewing_employee_id:
-        view_offer_letter(st.session_state.viewing_employee_id)
-        return
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button(
+            "Download Session Trace (JSONL)",
+            data=lambda traces=traces[::-1]: to_jsonl(traces),
+            file_name="session_trace.jsonl",
+            mime="application/x-ndjson",
+            disabled=not traces
+        )
+    with col2:
+        st.download_button(
+            "Download Histogram (JSONL)",
+            data=lambda: to_jsonl(HISTOGRAM.snapshot()),
+            file_name="span_histogram.jsonl",
+            mime="application/x-ndjson",
+            disabled=not histogram
+        )
+    with col3:
+        if st.button("Reset Histogram", key="perf_reset_histogram"):
+            HISTOGRAM.reset()
+            st.rerun()
+
+def toggle_candidate_selection(employee_id):
+    if st.session_state[f"select_{employee_id}"]:
+        st.session_state.selected_candidates.add(employee_id)
+    else:
+        st.session_state.selected_candidates.discard(employee_id)
+
+def notification_history_tab():
+    st.subheader("Notification History")
+    
+    # Recent items from this session's ring buffer
+    if st.session_state.notification_history:
+        st.markdown("**This session**")
+        markdown_table([
+            {key: entry.get(key, "") for key in ("timestamp", "priority", "subject", "recipient")}
+            for entry in reversed(st.session_state.notification_history)
+        ])
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        priorities = st.multiselect("Priority", ["normal", "high", "urgent"], key="notification_priority_filter")
+    with col2:
+        search_term = st.text_input("🔍 Search subject or recipient", key="notification_search")
+    
+    # Restart pagination whenever the filters change
+    query_signature = (tuple(priorities), search_term)
+    if st.session_state.get('notification_query') != query_signature:
+        st.session_state.notification_query = query_signature
+        st.session_state.notification_cursors = [None]
+    cursors = st.session_state.notification_cursors
+    
+    rows, next_cursor = query_notifications(priorities, search_term, before_id=cursors[-1])
+    if not rows:
+        st.info("No notifications found.")
+    for row in rows:
+        with st.expander(f"{row['created_at']} · {row['priority'].upper()} · {row['subject']} → {row['recipient']}"):
+            st.markdown(row['message'] or "", unsafe_allow_html=True)
+    
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if len(cursors) > 1 and st.button("← Newer", key="notification_prev_page"):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.caption(f"Page {len(cursors)}")
+    with next_col:
+        if next_cursor and st.button("Older →", key="notification_next_page"):
+            cursors.append(next_cursor)
+            st.rerun()
+
+# Chart rendering. Figures are built with the object-oriented Figure API rather
+# than pyplot, so nothing is ever added to pyplot's global figure registry, and
+# the PNGs are cached on the counts they depict so unchanged charts cost nothing.
+CHART_DPI = 100
+
+def _figure_to_png(fig):
+    buffer = BytesIO()
+    # Same tight bounding box st.pyplot uses, so legends outside the axes are kept
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_status_chart(sizes):
+    """
+    Render the offer status pie chart as PNG bytes
     
-    # Get employee data for statistics
-    employees = get_employees()
+    Args:
+        sizes (tuple): Candidate counts for each of the four pipeline stages
+    """
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=(8, 5), dpi=CHART_DPI)
+    ax = fig.subplots()
+    labels = ['Offers Generated', 'Offers Sent', 'Offers Accepted', 'Onboarding Completed']
+    colors = ['#1976D2', '#F57C00', '#388E3C', '#00ACC1']
+    
+    # Only include non-zero values in the pie chart
+    filtered_labels = [label for i, label in enumerate(labels) if sizes[i] > 0]
+    filtered_sizes = [size for size in sizes if size > 0]
+    filtered_colors = [color for i, color in enumerate(colors) if sizes[i] > 0]
+    
+    wedges, texts, autotexts = ax.pie(
+        filtered_sizes, 
+        autopct='%1.1f%%',
+        startangle=90,
+        colors=filtered_colors,
+        wedgeprops={'edgecolor': 'w', 'linewidth': 1}
+    )
     
-    # Calculate statistics
-    total_offers = len(employees)
-    offers_sent = sum(1 for emp in employees if emp.get('offer_sent', False))
-    offers_accepted = sum(1 for emp in employees if emp.get('offer_accepted', False))
-    pending_onboarding = sum(1 for emp in employees if emp.get('offer_accepted', False) and not emp.get('onboarding_completed', False))
-    onboarding_completed = sum(1 for emp in employees if emp.get('onboarding_completed', False))
+    # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.axis('equal')
     
-    # Display statistics cards with consistent sizing
-    st.markdown("<h3>📊 Onboarding Overview</h3>", unsafe_allow_html=True)
+    # Add legend
+    ax.legend(
+        wedges, 
+        filtered_labels,
+        title="Offer Status",
+        loc="center left",
+        bbox_to_anchor=(0.9, 0, 0.5, 1)
+    )
+    
+    ax.set_title('Offer Status Distribution')
+    return _figure_to_png(fig)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_role_chart(role_counts):
+    """
+    Render the candidates-by-role bar chart as PNG bytes
+    
+    Args:
+        role_counts (tuple): (role, count) pairs
+    """
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=(8, 5), dpi=CHART_DPI)
+    ax = fig.subplots()
+    
+    roles = [role for role, _ in role_counts]
+    counts = [count for _, count in role_counts]
+    
+    # Create horizontal bar chart
+    ax.barh(roles, counts, color='#2E5090')
+    
+    # Add count annotations to the bars
+    for i, v in enumerate(counts):
+        ax.text(v + 0.1, i, str(v), color='black', va='center')
     
-    col1, col2, col3, col4, col5 = st.columns(5)
+    ax.set_xlabel('Number of Candidates')
+    ax.set_title('Candidates by Role')
+    
+    fig.tight_layout()
+    return _figure_to_png(fig)
+
+def live_figure_count():
+    """Number of figures held open in pyplot's registry (should stay at zero)."""
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return len(pyplot.get_fignums()) if pyplot else 0
+
+# Dashboard page with enhanced visualizations
+#
+# The dashboard is split into fragments so a widget only reruns the part of
+# the page it affects. Invalidation rules:
+#   overview cards   redrawn on full reruns, and by a status cell after it
+#                    changes a status (the cards live in a placeholder)
+#   charts           full reruns, and every DASHBOARD_CHARTS_REFRESH_SECONDS;
+#                    cached on data_version, so an unchanged table costs a lookup
+#   candidate table  its own widgets: search, sort, page size, paging, selection
+#                    and bulk generation
+#   status cell      one row's status selectbox; redraws that row's stripe and
+#                    the overview cards, nothing else
+#   offer letters    its own widgets: search, export, paging and the viewer
+# Widgets that leave the page (View, Generate New Offer Letter) rerun the app.
+DASHBOARD_CHARTS_REFRESH_SECONDS = 30
+
+# Row stripe colors for each candidate status
+STATUS_ROW_COLORS = {
+    "Onboarding Completed": "#e8f5e9",  # Light green
+    "Offer Accepted": "#fff3e0",  # Light orange
+    "Offer Sent": "#e3f2fd",  # Light blue
+    "Offer Generated": "#f5f5f5",  # Light gray
+}
+
+def trace_fragment(label):
+    """Record a fragment's own reruns as traces; inside a full rerun it is just a span."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with rerun_trace(st.session_state.perf_traces, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def render_overview_cards(placeholder):
+    """Draw the five overview cards into placeholder from the trigger-maintained counters."""
+    counts = get_dashboard_counts()
     
     # Card styling with fixed width and height to ensure consistent sizing
     card_style = """
@@ -1316,46 +3291,29 @@ def display_dashboard():
     justify-content: center;
     align-items: center;
     """
+    cards = [
+        ("total_offers", "Total Offers", "#e3f2fd", "#1976D2"),
+        ("offers_sent", "Offers Sent", "#e8f5e9", "#388E3C"),
+        ("offers_accepted", "Offers Accepted", "#fff3e0", "#F57C00"),
+        ("pending_onboarding", "Pending Onboarding", "#e8eaf6", "#3F51B5"),
+        ("onboarding_completed", "Onboarding Completed", "#e0f7fa", "#00ACC1"),
+    ]
     
-    with col1:
-        st.markdown(f"""
-        <div style="{card_style.format(bg_color='#e3f2fd')}">
-            <h1 style="color: #1976D2; font-size: 2.5rem; margin: 0;">{total_offers}</h1>
-            <p style="margin: 5px 0 0 0;">Total Offers</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div style="{card_style.format(bg_color='#e8f5e9')}">
-            <h1 style="color: #388E3C; font-size: 2.5rem; margin: 0;">{offers_sent}</h1>
-            <p style="margin: 5px 0 0 0;">Offers Sent</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div style="{card_style.format(bg_color='#fff3e0')}">
-            <h1 style="color: #F57C00; font-size: 2.5rem; margin: 0;">{offers_accepted}</h1>
-            <p style="margin: 5px 0 0 0;">Offers Accepted</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div style="{card_style.format(bg_color='#e8eaf6')}">
-            <h1 style="color: #3F51B5; font-size: 2.5rem; margin: 0;">{pending_onboarding}</h1>
-            <p style="margin: 5px 0 0 0;">Pending Onboarding</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col5:
-        st.markdown(f"""
-        <div style="{card_style.format(bg_color='#e0f7fa')}">
-            <h1 style="color: #00ACC1; font-size: 2.5rem; margin: 0;">{onboarding_completed}</h1>
-            <p style="margin: 5px 0 0 0;">Onboarding Completed</p>
-        </div>
-        """, unsafe_allow_html=True)
+    with placeholder.container():
+        for col, (key, label, bg_color, color) in zip(st.columns(len(cards)), cards):
+            col.markdown(f"""
+            <div style="{card_style.format(bg_color=bg_color)}">
+                <h1 style="color: {color}; font-size: 2.5rem; margin: 0;">{counts[key]}</h1>
+                <p style="margin: 5px 0 0 0;">{label}</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+@st.fragment(run_every=DASHBOARD_CHARTS_REFRESH_SECONDS)
+@trace_fragment("fragment.charts")
+def dashboard_charts():
+    # Chart data comes from one columnar read, cached until the employees table changes
+    with span("analytics.dashboard"):
+        analytics = get_dashboard_analytics(get_data_version(), datetime.now().date().isoformat())
     
     # Visualizations section
     st.markdown("<h3>📈 Onboarding Analytics</h3>", unsafe_allow_html=True)
@@ -1363,148 +3321,142 @@ def display_dashboard():
     left_col, right_col = st.columns(2)
     
     with left_col:
-        # Generate pie chart for offer status
-        fig, ax = plt.subplots(figsize=(8, 5))
-        labels = ['Offers Generated', 'Offers Sent', 'Offers Accepted', 'Onboarding Completed']
-        sizes = [total_offers - offers_sent, offers_sent - offers_accepted, offers_accepted - onboarding_completed, onboarding_completed]
-        colors = ['#1976D2', '#F57C00', '#388E3C', '#00ACC1']
-        
-        # Only include non-zero values in the pie chart
-        filtered_labels = [label for i, label in enumerate(labels) if sizes[i] > 0]
-        filtered_sizes = [size for size in sizes if size > 0]
-        filtered_colors = [color for i, color in enumerate(colors) if sizes[i] > 0]
-        
-        if filtered_sizes:
-            wedges, texts, autotexts = ax.pie(
-                filtered_sizes, 
-                autopct='%1.1f%%',
-                startangle=90,
-                colors=filtered_colors,
-                wedgeprops={'edgecolor': 'w', 'linewidth': 1}
-            )
-            
-            # Equal aspect ratio ensures that pie is drawn as a circle
-            ax.axis('equal')
-            
-            # Add legend
-            ax.legend(
-                wedges, 
-                filtered_labels,
-                title="Offer Status",
-                loc="center left",
-                bbox_to_anchor=(0.9, 0, 0.5, 1)
-            )
-            
-            plt.title('Offer Status Distribution')
-            
-            # Display the chart in Streamlit
-            st.pyplot(fig)
+        # Pie chart for offer status, rendered once per distinct set of counts
+        sizes = analytics['status_counts']
+        
+        if any(size > 0 for size in sizes):
+            with span("chart.status"):
+                st.image(render_status_chart(sizes), use_container_width=True)
         else:
             st.info("No data available for the pie chart.")
     
     with right_col:
         # Role distribution bar chart
-        role_counts = {}
-        for emp in employees:
-            role = emp.get('position', 'Unknown')
-            role_counts[role] = role_counts.get(role, 0) + 1
+        role_counts = analytics['role_counts']
         
         if role_counts:
-            fig, ax = plt.subplots(figsize=(8, 5))
-            
-            roles = list(role_counts.keys())
-            counts = list(role_counts.values())
-            
-            # Create horizontal bar chart
-            bars = ax.barh(roles, counts, color='#2E5090')
-            
-            # Add count annotations to the bars
-            for i, v in enumerate(counts):
-                ax.text(v + 0.1, i, str(v), color='black', va='center')
-            
-            ax.set_xlabel('Number of Candidates')
-            ax.set_title('Candidates by Role')
-            
-            plt.tight_layout()
-            
-            # Display the chart in Streamlit
-            st.pyplot(fig)
+            with span("chart.role"):
+                st.image(render_role_chart(role_counts), use_container_width=True)
         else:
             st.info("No data available for the role distribution chart.")
     
-    # Function to update employee status
-    def update_employee_status(employee_id, new_status):
-        employee = get_employee_by_id(employee_id)
-        if employee:
-            # Get current status for comparison
-            if employee.get('onboarding_completed', False):
-                current_status = "Onboarding Completed"
-            elif employee.get('offer_accepted', False):
-                current_status = "Offer Accepted"
-            elif employee.get('offer_sent', False):
-                current_status = "Offer Sent"
-            else:
-                current_status = "Offer Generated"
-                
-            # Skip if status hasn't changed
-            if current_status == new_status:
-                return
-                
-            # Set status flags based on new status
-            if new_status == "Offer Generated":
-                employee['offer_sent'] = False
-                employee['offer_accepted'] = False
-                employee['onboarding_completed'] = False
-            elif new_status == "Offer Sent":
-                employee['offer_sent'] = True
-                employee['offer_sent_date'] = datetime.now().strftime("%Y-%m-%d")
-                employee['offer_accepted'] = False
-                employee['onboarding_completed'] = False
-            elif new_status == "Offer Accepted":
-                employee['offer_sent'] = True
-                # Set offer_sent_date if not already set
-                if not employee.get('offer_sent_date'):
-                    employee['offer_sent_date'] = datetime.now().strftime("%Y-%m-%d")
-                employee['offer_accepted'] = True
-                employee['onboarding_completed'] = False
-            elif new_status == "Onboarding Completed":
-                employee['offer_sent'] = True
-                # Set offer_sent_date if not already set
-                if not employee.get('offer_sent_date'):
-                    employee['offer_sent_date'] = datetime.now().strftime("%Y-%m-%d")
-                employee['offer_accepted'] = True
-                employee['onboarding_completed'] = True
-            
-            # Save updated employee data
-            save_employee(employee)
-            
-            # Add a notification about the status change
-            status_change_msg = f"""
-            <h2>Status Update</h2>
-            <p>The status for <strong>{employee['name']}</strong> has been updated from <strong>{current_status}</strong> to <strong>{new_status}</strong>.</p>
-            <p><strong>Position:</strong> {employee['position']}</p>
-            <p><strong>Start Date:</strong> {employee.get('start_date', 'Not set')}</p>
-            """
-            
-            # Set notification priority based on status
-            priority = "normal"
-            if new_status == "Offer Accepted":
-                priority = "high"
-            elif new_status == "Onboarding Completed":
-                priority = "normal"
-                
-            # Send notification email about status change
-            send_notification_email(
-                f"Status Changed: {employee['name']} - {new_status}",
-                status_change_msg,
-                priority=priority
-            )
-            
-            st.success(f"Status updated for {employee['name']} to {new_status}")
-            
-            # Force refresh to update dashboard counts
-            st.rerun()
+    # Upcoming start dates, bucketed by days from today
+    if analytics['counts']['total_offers']:
+        st.markdown("<h4>🗓️ Upcoming Start Dates</h4>", unsafe_allow_html=True)
+        for bucket_col, (label, count) in zip(st.columns(len(analytics['start_buckets'])), analytics['start_buckets']):
+            bucket_col.metric(label, count)
+
+# Function to update employee status
+def update_employee_status(employee_id, new_status):
+    """
+    Set a candidate's status flags and notify HR of the change
+    
+    Returns:
+        bool: True if the candidate exists and the status changed
+    """
+    employee = get_employee_by_id(employee_id)
+    if not employee:
+        return False
+    
+    # Get current status for comparison
+    current_status = employee_status(employee)
+        
+    # Skip if status hasn't changed
+    if current_status == new_status:
+        return False
+        
+    # Set status flags based on new status
+    if new_status == "Offer Generated":
+        employee['offer_sent'] = False
+        employee['offer_accepted'] = False
+        employee['onboarding_completed'] = False
+    elif new_status == "Offer Sent":
+        employee['offer_sent'] = True
+        employee['offer_sent_date'] = datetime.now().strftime("%Y-%m-%d")
+        employee['offer_accepted'] = False
+        employee['onboarding_completed'] = False
+    elif new_status == "Offer Accepted":
+        employee['offer_sent'] = True
+        # Set offer_sent_date if not already set
+        if not employee.get('offer_sent_date'):
+            employee['offer_sent_date'] = datetime.now().strftime("%Y-%m-%d")
+        employee['offer_accepted'] = True
+        employee['onboarding_completed'] = False
+    elif new_status == "Onboarding Completed":
+        employee['offer_sent'] = True
+        # Set offer_sent_date if not already set
+        if not employee.get('offer_sent_date'):
+            employee['offer_sent_date'] = datetime.now().strftime("%Y-%m-%d")
+        employee['offer_accepted'] = True
+        employee['onboarding_completed'] = True
+    
+    # Save updated employee data
+    save_employee(employee)
+    
+    # Add a notification about the status change
+    status_change_msg = f"""
+    <h2>Status Update</h2>
+    <p>The status for <strong>{employee['name']}</strong> has been updated from <strong>{current_status}</strong> to <strong>{new_status}</strong>.</p>
+    <p><strong>Position:</strong> {employee['position']}</p>
+    <p><strong>Start Date:</strong> {employee.get('start_date', 'Not set')}</p>
+    """
+    
+    # Set notification priority based on status
+    priority = "normal"
+    if new_status == "Offer Accepted":
+        priority = "high"
+    elif new_status == "Onboarding Completed":
+        priority = "normal"
+        
+    # Send notification email about status change
+    send_notification_email(
+        f"Status Changed: {employee['name']} - {new_status}",
+        status_change_msg,
+        priority=priority
+    )
+    
+    st.session_state.status_update_message = f"Status updated for {employee['name']} to {new_status}"
+    return True
+
+def change_candidate_status(employee_id):
+    # on_change callback of a status selectbox; runs before its fragment reruns
+    update_employee_status(employee_id, st.session_state[f"status_{employee_id}"])
+
+@st.fragment
+@trace_fragment("fragment.status_cell")
+def candidate_status_cell(employee_id, stripe, overview):
+    """
+    Status selectbox for one table row
+    
+    Args:
+        employee_id (str): Candidate shown in the row
+        stripe: Placeholder for the row's color stripe
+        overview: Placeholder holding the overview cards
+    """
+    status = st.selectbox(
+        "Status",
+        STATUS_OPTIONS,
+        key=f"status_{employee_id}",
+        on_change=change_candidate_status,
+        args=(employee_id,),
+        label_visibility="collapsed"
+    )
+    
+    # Create row container with background color
+    stripe.markdown(f"""
+    <div style="display: flex; padding: 10px 0; border-bottom: 1px solid #eee; background-color: {STATUS_ROW_COLORS.get(status, '#f5f5f5')}; border-radius: 4px; margin-bottom: 5px; padding: 10px;">
+    </div>
+    """, unsafe_allow_html=True)
     
+    # The counters changed with the status; nothing else on the page did
+    message = st.session_state.pop('status_update_message', None)
+    if message:
+        render_overview_cards(overview)
+        st.toast(message)
+
+@st.fragment
+@trace_fragment("fragment.candidate_table")
+def candidate_table(overview):
     # New tabular view of all candidates with status dropdown
     st.markdown("<h3>👥 Candidate Management</h3>", unsafe_allow_html=True)
     
@@ -1517,14 +3469,30 @@ def display_dashboard():
     
     # Add search and filter options
     with col2:
-        col2a, col2b = st.columns([2, 1])
+        col2a, col2b, col2c = st.columns([2, 1, 1])
         with col2a:
             search_term = st.text_input("🔍 Search by name or role", "")
         with col2b:
+            # Best matches first while searching; the other orders still apply
+            sort_options = list(CANDIDATE_SORT_OPTIONS.keys())
+            if build_fts_query(search_term):
+                sort_options.insert(0, RELEVANCE_SORT_OPTION)
             sort_option = st.selectbox(
                 "Sort by:",
-                ["Name (A-Z)", "Name (Z-A)", "Status", "Start Date (Recent)", "Start Date (Oldest)"]
+                sort_options
             )
+        with col2c:
+            page_size = st.selectbox("Per page:", PAGE_SIZE_OPTIONS, index=1)
+    
+    # Restart pagination whenever the search, sort or page size changes
+    query_signature = (search_term, sort_option, page_size)
+    if st.session_state.get('candidate_query') != query_signature:
+        st.session_state.candidate_query = query_signature
+        st.session_state.candidate_cursors = [None]
+    cursors = st.session_state.candidate_cursors
+    
+    # Fetch only the rows for the current page
+    page_employees, next_cursor = query_employees(search_term, sort_option, page_size, after=cursors[-1])
     
     # Create a container for the table with a card-like appearance
     st.markdown("""
@@ -1540,135 +3508,98 @@ def display_dashboard():
     """, unsafe_allow_html=True)
     
     # Display table of employees with status dropdown
-    if employees:
-        # Filter employees based on search term if provided
-        if search_term:
-            filtered_employees = [emp for emp in employees if 
-                                search_term.lower() in emp.get('name', '').lower() or 
-                                search_term.lower() in emp.get('position', '').lower()]
-        else:
-            filtered_employees = employees
-            
-        # Add sorting functionality
-        if sort_option == "Name (A-Z)":
-            filtered_employees = sorted(filtered_employees, key=lambda x: x.get('name', '').lower())
-        elif sort_option == "Name (Z-A)":
-            filtered_employees = sorted(filtered_employees, key=lambda x: x.get('name', '').lower(), reverse=True)
-        elif sort_option == "Status":
-            # Define a custom sort key function for status
-            def status_key(emp):
-                if emp.get('onboarding_completed', False):
-                    return 4
-                elif emp.get('offer_accepted', False):
-                    return 3
-                elif emp.get('offer_sent', False):
-                    return 2
-                else:
-                    return 1
-            filtered_employees = sorted(filtered_employees, key=status_key, reverse=True)
-        elif sort_option == "Start Date (Recent)":
-            # Sort by start date, most recent first
-            filtered_employees = sorted(filtered_employees, 
-                                    key=lambda x: datetime.strptime(x.get('start_date', '2000-01-01'), "%B %d, %Y") 
-                                    if 'start_date' in x and x['start_date'] else datetime(2000, 1, 1),
-                                    reverse=True)
-        elif sort_option == "Start Date (Oldest)":
-            # Sort by start date, oldest first
-            filtered_employees = sorted(filtered_employees, 
-                                    key=lambda x: datetime.strptime(x.get('start_date', '3000-01-01'), "%B %d, %Y") 
-                                    if 'start_date' in x and x['start_date'] else datetime(3000, 1, 1))
-        
-        if filtered_employees:
-            # Create a table with columns for Name, Position, Status, and Actions
-            table_data = []
-            for emp in filtered_employees:
-                # Determine current status for default selection
-                if emp.get('onboarding_completed', False):
-                    current_status = "Onboarding Completed"
-                elif emp.get('offer_accepted', False):
-                    current_status = "Offer Accepted"
-                elif emp.get('offer_sent', False):
-                    current_status = "Offer Sent"
-                else:
-                    current_status = "Offer Generated"
-                
-                # Add to table data
-                table_data.append({
-                    "id": emp['id'],
-                    "name": emp['name'],
-                    "position": emp['position'],
-                    "start_date": emp.get('start_date', 'Not set'),
-                    "status": current_status
-                })
-            
-            # Create DataFrame for display
-            df = pd.DataFrame(table_data)
-            
-            # Create a custom table with interactive elements
-            for i, row in enumerate(table_data):
-                # Determine row background color based on status
-                if row['status'] == "Onboarding Completed":
-                    row_bg_color = "#e8f5e9"  # Light green
-                elif row['status'] == "Offer Accepted":
-                    row_bg_color = "#fff3e0"  # Light orange
-                elif row['status'] == "Offer Sent":
-                    row_bg_color = "#e3f2fd"  # Light blue
-                else:
-                    row_bg_color = "#f5f5f5"  # Light gray
-                
-                # Create row container with background color
-                st.markdown(f"""
-                <div style="display: flex; padding: 10px 0; border-bottom: 1px solid #eee; background-color: {row_bg_color}; border-radius: 4px; margin-bottom: 5px; padding: 10px;">
-                </div>
-                """, unsafe_allow_html=True)
+    if page_employees:
+        # Create a custom table with interactive elements
+        with span("table.candidates"):
+            for emp in page_employees:
+                # The table reflects the database; status is maintained by save_employee
+                st.session_state[f"status_{emp['id']}"] = emp.get('status') or "Offer Generated"
+                stripe = st.empty()
                 
                 # Inside the row, use columns for layout
                 col1, col2, col3, col4, col5 = st.columns([2, 2, 1.5, 2, 1.5])
                 
                 with col1:
-                    st.markdown(f"**{row['name']}**")
+                    # Selection for bulk actions, kept in session state across pages
+                    st.checkbox(
+                        f"**{emp['name']}**",
+                        value=emp['id'] in st.session_state.selected_candidates,
+                        key=f"select_{emp['id']}",
+                        on_change=toggle_candidate_selection,
+                        args=(emp['id'],)
+                    )
                 
                 with col2:
-                    st.markdown(row['position'])
+                    st.markdown(emp['position'])
                 
                 with col3:
-                    st.markdown(row['start_date'])
+                    st.markdown(emp.get('start_date') or 'Not set')
                 
                 with col4:
-                    # Status dropdown that updates database on change
-                    status_options = ["Offer Generated", "Offer Sent", "Offer Accepted", "Onboarding Completed"]
-                    status_index = status_options.index(row['status'])
-                    
-                    new_status = st.selectbox(
-                        "Status",
-                        status_options,
-                        index=status_index,
-                        key=f"status_{row['id']}",
-                        label_visibility="collapsed"
-                    )
-                    
-                    # Check if status changed and update if needed
-                    if new_status != row['status']:
-                        update_employee_status(row['id'], new_status)
+                    # Status dropdown that updates the database on change, in its own fragment
+                    candidate_status_cell(emp['id'], stripe, overview)
                 
                 with col5:
-                    view_btn = st.button("👁️ View", key=f"view_{row['id']}")
+                    view_btn = st.button("👁️ View", key=f"view_{emp['id']}")
                     if view_btn:
-                        st.session_state.viewing_employee_id = row['id']
+                        st.session_state.viewing_employee_id = emp['id']
                         st.rerun()
-
-
-        
-        else:
-            st.info("No results match your search criteria.")
+    elif search_term or len(cursors) > 1:
+        st.info("No results match your search criteria.")
     else:
         st.info("No candidates found in the system.")
     
-    # Add helpful information at the bottom of the table
+    # Bulk actions on the candidates ticked in the table
+    selected_ids = list(st.session_state.selected_candidates)
+    if selected_ids:
+        if st.button(f"📄 Generate Offers for Selected ({len(selected_ids)})", key="bulk_generate_offers"):
+            progress = st.progress(0.0, text="Generating offer letters...")
+            
+            def report_progress(done, total, employee):
+                progress.progress(done / total, text=f"Generated {done} of {total} ({employee['name']})")
+            
+            generated, failures = generate_offer_letters_bulk(selected_ids, report_progress)
+            st.success(f"✅ Generated {len(generated)} offer letters in {DOCUMENTS_DIR}")
+            for employee, error in failures:
+                st.error(f"Failed to generate offer letter for {employee['name']}: {error}")
+    
+    # Keyset pagination controls
+    # Cursors change in the click callbacks, before the fragment reruns
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if len(cursors) > 1:
+            st.button("← Previous", key="candidate_prev_page", on_click=cursors.pop)
+    with page_col:
+        st.caption(f"Page {len(cursors)} · {len(page_employees)} candidates shown")
+    with next_col:
+        if next_cursor:
+            st.button("Next →", key="candidate_next_page", on_click=cursors.append, args=(next_cursor,))
+    
     st.markdown("""
     </div>
     """, unsafe_allow_html=True)
+
+def display_dashboard():
+    st.title("Onboarding Dashboard")
+    
+    # Initialize viewing_employee_id in session state if not present
+    if 'viewing_employee_id' not in st.session_state:
+        st.session_state.viewing_employee_id = None
+    
+    # If viewing a specific employee, show their offer letter
+    if st.session_state.viewing_employee_id:
+        view_offer_letter(st.session_state.viewing_employee_id)
+        return
+    
+    # Display statistics cards with consistent sizing
+    st.markdown("<h3>📊 Onboarding Overview</h3>", unsafe_allow_html=True)
+    overview = st.empty()
+    render_overview_cards(overview)
+    
+    dashboard_charts()
+    candidate_table(overview)
     
+    # Add helpful information at the bottom of the table
     st.markdown("""
     <div style="margin-top: 15px; padding: 10px; background-color: #f0f9ff; border-radius: 5px; border-left: 4px solid #2E5090;">
         <h4 style="margin: 0 0 10px 0;">💡 Using the Candidate Status Management Table</h4>
@@ -1686,6 +3617,10 @@ def display_dashboard():
     
     # [Rest of the existing dashboard code here...]
     
+    # Email delivery state from the outbox
+    st.markdown("<hr>", unsafe_allow_html=True)
+    display_email_delivery_section()
+    
     # Add the new offer letters section - place it where appropriate in your dashboard
     st.markdown("<hr>", unsafe_allow_html=True)
     display_offer_letters_section()
@@ -1709,7 +3644,9 @@ def check_human_intervention(employee_data):
     
     # Check for unusual salary
     try:
-        salary = int(employee_data.get("annual_salary", "0").replace(",", ""))
+        salary = employee_data.get("salary_monthly")
+        if salary is None:
+            salary = int(employee_data.get("annual_salary", "0").replace(",", ""))
         if salary > 200000:  # Unusually high salary
             return "high_priority"
         if salary < 10000 and salary > 0:  # Unusually low salary
@@ -1786,110 +3723,192 @@ def get_intervention_message(employee_data, intervention_type):
             <li>Ensure the onboarding process is on track</li>
         </ul>
         """
+def display_email_delivery_section():
+    """Show the delivery state of queued and sent emails."""
+    st.markdown("<h3>📬 Email Delivery</h3>", unsafe_allow_html=True)
+    
+    counts, recent, failed = get_outbox_summary()
+    cols = st.columns(len(OUTBOX_STATUSES))
+    for col, status in zip(cols, OUTBOX_STATUSES):
+        with col:
+            st.metric(status.capitalize(), counts[status])
+    
+    # Candidates whose offer email gave up after OUTBOX_MAX_ATTEMPTS
+    if failed:
+        st.error(f"{counts['failed']} email(s) could not be delivered")
+        for message in failed:
+            st.markdown(
+                f"- **{message['candidate'] or message['to_email']}** ({message['to_email']}): "
+                f"{message['subject']} — failed after {message['attempts']} attempts: `{message['last_error']}`"
+            )
+        st.button(
+            "Retry failed emails",
+            key="retry_failed_emails",
+            on_click=retry_failed_emails,
+            args=([message["id"] for message in failed],)
+        )
+    
+    if recent:
+        with st.expander("Recent emails"):
+            st.dataframe(recent, use_container_width=True, hide_index=True)
+    else:
+        st.info("No emails have been queued yet.")
+
+def set_current_pdf(pdf):
+    st.session_state.current_pdf = pdf
+
+@st.fragment
+@trace_fragment("fragment.offer_letters")
 def display_offer_letters_section():
     """Display all generated offer letters on the dashboard."""
     st.markdown("<h3>📄 Generated Offer Letters</h3>", unsafe_allow_html=True)
     
-    # Check if DOCUMENTS_DIR exists and has files
-    if not os.path.exists(DOCUMENTS_DIR):
-        st.warning("Documents directory not found. No offer letters available.")
-        return
+    # Add search functionality for offer letters
+    search_term = st.text_input("🔍 Search offer letters by name", key="offer_letter_search")
     
-    # Get all PDF files from the documents directory that match offer letter pattern
-    offer_letter_files = []
-    for file in os.listdir(DOCUMENTS_DIR):
-        if file.endswith(".pdf") and "offer_letter" in file.lower():
-            file_path = os.path.join(DOCUMENTS_DIR, file)
-            creation_time = os.path.getctime(file_path)
-            creation_date = datetime.fromtimestamp(creation_time).strftime("%Y-%m-%d %H:%M:%S")
+    # Bulk export, written to disk and downloaded through the letter server when one is configured
+    with st.expander("📦 Export offer letters and candidate data"):
+        selected_ids = list(st.session_state.get('selected_candidates', set()))
+        scope_labels = {
+            "search": "Candidates matching the search" if search_term else "All candidates",
+            "selected": f"Selected candidates ({len(selected_ids)})",
+        }
+        export_scope = st.radio(
+            "Export",
+            ["search", "selected"] if selected_ids else ["search"],
+            format_func=scope_labels.get,
+            horizontal=True,
+            key="export_scope"
+        )
+        data_format = st.selectbox("Candidate data format", EXPORT_FORMATS, key="export_format")
+        
+        if st.button("Build Export", key="build_export"):
+            progress = st.progress(0.0, text="Collecting offer letters...")
             
-            # Extract employee name from filename
-            try:
-                employee_name = file.split('_')[0].replace('_', ' ')
-            except:
-                employee_name = "Unknown"
+            def report_progress(done, total):
+                progress.progress(done / total, text=f"Added {done} of {total} offer letters")
             
-            offer_letter_files.append({
-                "filename": file,
-                "file_path": file_path,
-                "creation_date": creation_date,
-                "employee_name": employee_name
-            })
-    
-    # Sort files by creation date (newest first)
-    offer_letter_files.sort(key=lambda x: x["creation_date"], reverse=True)
-    
-    if not offer_letter_files:
-        st.info("No offer letters have been generated yet.")
-        return
+            try:
+                archive_path, letter_count, row_count = build_export_archive(
+                    search_term,
+                    employee_ids=selected_ids if export_scope == "selected" else None,
+                    data_format=data_format,
+                    progress_callback=report_progress
+                )
+                progress.progress(1.0, text="Export ready")
+                st.session_state.last_export = {
+                    "path": str(archive_path),
+                    "letters": letter_count,
+                    "rows": row_count
+                }
+            except ImportError:
+                st.error("Parquet export requires the pyarrow package. Choose CSV instead.")
+        
+        last_export = st.session_state.get('last_export')
+        if last_export and Path(last_export['path']).exists():
+            archive_path = Path(last_export['path'])
+            server = get_letter_server()
+            if server is not None:
+                st.link_button(f"⬇️ Download {archive_path.name}", server.url_for(archive_path))
+            else:
+                # Read only when clicked; the archive then goes out over the websocket
+                st.download_button(
+                    label=f"⬇️ Download {archive_path.name}",
+                    data=lambda: archive_path.read_bytes(),
+                    file_name=archive_path.name,
+                    mime="application/zip",
+                    key="download_export"
+                )
+            st.caption(f"{last_export['letters']} offer letters · {last_export['rows']} candidate rows · {archive_path.stat().st_size / (1024 * 1024):.1f} MB")
     
-    # Add search functionality for offer letters
-    search_term = st.text_input("🔍 Search offer letters by name", key="offer_letter_search")
+    # Restart pagination whenever the search changes
+    if st.session_state.get('offer_letter_query') != search_term:
+        st.session_state.offer_letter_query = search_term
+        st.session_state.offer_letter_cursors = [None]
+    cursors = st.session_state.offer_letter_cursors
     
-    # Filter by search term if provided
-    if search_term:
-        filtered_files = [file for file in offer_letter_files if search_term.lower() in file["employee_name"].lower()]
-    else:
-        filtered_files = offer_letter_files
+    # Page through the documents index; no directory scan and no file reads
+    letters, next_cursor = query_offer_letters(search_term, OFFER_LETTER_PAGE_SIZE, before=cursors[-1])
+    
+    if not letters and len(cursors) == 1:
+        if search_term:
+            st.info("No matching offer letters found.")
+        else:
+            st.info("No offer letters have been generated yet.")
+        return
     
     # Display the offer letters in a table
-    if filtered_files:
-        for i, file in enumerate(filtered_files):
-            with st.container():
-                cols = st.columns([3, 2, 1, 1])
-                
-                with cols[0]:
-                    st.write(f"**{file['employee_name']}**")
-                    st.caption(file['filename'])
-                
-                with cols[1]:
-                    st.write(file['creation_date'])
-                
-                with cols[2]:
-                    # Read PDF for download
-                    with open(file['file_path'], "rb") as pdf_file:
-                        pdf_bytes = pdf_file.read()
-                    
-                    st.download_button(
-                        label="📥",
-                        data=pdf_bytes,
-                        file_name=file['filename'],
-                        mime="application/pdf",
-                        key=f"download_{i}"
-                    )
-                
-                with cols[3]:
-                    # View button
-                    if st.button("👁️", key=f"view_{i}"):
-                        # Store current viewing PDF info in session state
-                        with open(file['file_path'], "rb") as pdf_file:
-                            pdf_bytes = pdf_file.read()
-                            pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
-                        
-                        st.session_state.current_pdf = {
-                            'name': file['filename'],
-                            'content': pdf_base64
-                        }
-                        st.rerun()
-                
-                st.markdown("---")
-    else:
-        st.info("No matching offer letters found.")
+    for letter in letters:
+        filename = Path(letter['file_path']).name
+        with st.container():
+            thumb_col, *cols = st.columns([1, 3, 2, 1, 1])
+            
+            with thumb_col:
+                # First-page thumbnail, a few KB instead of the whole PDF
+                previews = letter_previews(letter['file_path'])
+                if previews:
+                    st.image(str(previews[0]), width=GALLERY_THUMBNAIL_WIDTH)
+                elif previews is None:
+                    st.caption("📄 No preview")
+                else:
+                    st.caption("🖼️ Rendering…")
+            
+            with cols[0]:
+                st.write(f"**{letter['name']}**")
+                st.caption(f"{filename} · {(letter['size_bytes'] or 0) / 1024:.0f} KB")
+            
+            with cols[1]:
+                st.write(letter['upload_date'])
+            
+            with cols[2]:
+                # The file is only read when the download is actually clicked
+                st.download_button(
+                    label="📥",
+                    data=lambda path=letter['file_path']: Path(path).read_bytes(),
+                    file_name=filename,
+                    mime="application/pdf",
+                    key=f"download_letter_{letter['id']}"
+                )
+            
+            with cols[3]:
+                # View button
+                st.button(
+                    "👁️",
+                    key=f"view_letter_{letter['id']}",
+                    on_click=set_current_pdf,
+                    args=({'name': filename, 'file_path': letter['file_path']},)
+                )
+            
+            st.markdown("---")
+    
+    # Keyset pagination controls
+    # Cursors change in the click callbacks, before the fragment reruns
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if len(cursors) > 1:
+            st.button("← Previous", key="offer_letters_prev_page", on_click=cursors.pop)
+    with page_col:
+        st.caption(f"Page {len(cursors)} · {len(letters)} offer letters shown")
+    with next_col:
+        if next_cursor:
+            st.button("Next →", key="offer_letters_next_page", on_click=cursors.append, args=(next_cursor,))
     
     # Display the selected PDF if in viewing mode
     if 'current_pdf' in st.session_state and st.session_state.current_pdf:
         st.subheader(f"Viewing: {st.session_state.current_pdf['name']}")
         
-        # Display PDF using iframe
-        pdf_display = f'<iframe src="data:application/pdf;base64,{st.session_state.current_pdf["content"]}" width="100%" height="600" type="application/pdf"></iframe>'
-        st.markdown(pdf_display, unsafe_allow_html=True)
+        # Display the PDF from the letter server, or from Streamlit media without one
+        try:
+            show_pdf(st.session_state.current_pdf['file_path'], width="100%", height="600")
+        except (OSError, ValueError):
+            # ValueError: the indexed path is outside the letter server's directories
+            st.error("This offer letter is no longer available on disk.")
         
-        if st.button("Close PDF"):
-            st.session_state.current_pdf = None
-            st.rerun()
+        st.button("Close PDF", on_click=set_current_pdf, args=(None,))
 # Run the application
 if __name__ == "__main__":
-    main()
+    with rerun_trace(st.session_state.perf_traces, st.session_state.get("nav_page", st.session_state.page)):
+        main()
 
 
 # Function to check if email is valid
@@ -0,0 +1,223 @@
+"""
+Lightweight timing spans for finding where a rerun's time goes.
+
+Wrap a stage in ``with span("db.get_employees"):`` (or decorate it with
+``@traced("...")``) and its duration is recorded twice: in a process-wide
+histogram shared by every session, and in the trace of the rerun currently
+executing on this thread, if one was started with ``rerun_trace``. A span
+costs two clock reads, one lock and an append, so it belongs around stages
+that take tens of microseconds or more, not inside per-row loops.
+
+Set PERF_TRACING=0 to turn spans into no-ops, and PERF_TRACE_LOG to a file
+path to append every finished rerun trace to it as one JSON line.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+TRACING_ENABLED = os.getenv("PERF_TRACING", "1") != "0"
+PERF_TRACE_LOG = os.getenv("PERF_TRACE_LOG")
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is unbounded
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+# Span name recorded for the whole rerun
+RERUN_SPAN = "rerun"
+
+_current_trace = contextvars.ContextVar("perf_trace", default=None)
+_log_lock = threading.Lock()
+
+
+class SpanHistogram:
+    """Process-wide duration histogram per span name."""
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS_MS):
+        self.bounds = bounds
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed_ms):
+        bucket = 0
+        while elapsed_ms > self.bounds[bucket]:
+            bucket += 1
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * len(self.bounds)}
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["buckets"][bucket] += 1
+            if elapsed_ms > stats["max_ms"]:
+                stats["max_ms"] = elapsed_ms
+
+    def _percentile(self, buckets, count, fraction):
+        # Upper bound of the bucket holding the requested rank
+        rank = fraction * count
+        seen = 0
+        for bound, n in zip(self.bounds, buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+    def snapshot(self):
+        """
+        Summary of every span recorded so far
+
+        Returns:
+            list: One dict per span name, slowest total first, with count,
+                  total_ms, mean_ms, max_ms, p50_ms and p95_ms (bucket upper
+                  bounds, so "at most") and the raw bucket counts
+        """
+        with self._lock:
+            stats = {name: dict(values, buckets=list(values["buckets"])) for name, values in self._stats.items()}
+        summary = []
+        for name, values in stats.items():
+            count = values["count"]
+            summary.append({
+                "span": name,
+                "count": count,
+                "total_ms": round(values["total_ms"], 3),
+                "mean_ms": round(values["total_ms"] / count, 3),
+                "max_ms": round(values["max_ms"], 3),
+                "p50_ms": round(min(self._percentile(values["buckets"], count, 0.5), values["max_ms"]), 3),
+                "p95_ms": round(min(self._percentile(values["buckets"], count, 0.95), values["max_ms"]), 3),
+                "buckets": values["buckets"],
+            })
+        summary.sort(key=lambda item: item["total_ms"], reverse=True)
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+HISTOGRAM = SpanHistogram()
+
+
+class RerunTrace:
+    """Spans recorded during one script run of one session, in completion order."""
+
+    def __init__(self, label=None):
+        self.label = label
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.origin = time.perf_counter()
+        self.total_ms = None
+        self.spans = []
+        self.depth = 0
+
+    def to_dict(self):
+        return {
+            "started_at": self.started_at,
+            "label": self.label,
+            "total_ms": self.total_ms,
+            "spans": [
+                {"span": name, "start_ms": round(start_ms, 3), "duration_ms": round(duration_ms, 3), "depth": depth}
+                for name, start_ms, duration_ms, depth in self.spans
+            ],
+        }
+
+
+class span:
+    """
+    Context manager that times a block
+
+    Args:
+        name (str): Dotted stage name, e.g. ``db.get_employees`` or ``chart.status``
+    """
+
+    __slots__ = ("name", "trace", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if TRACING_ENABLED:
+            self.trace = _current_trace.get()
+            if self.trace is not None:
+                self.trace.depth += 1
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not TRACING_ENABLED:
+            return False
+        end = time.perf_counter()
+        elapsed_ms = (end - self.start) * 1000
+        HISTOGRAM.record(self.name, elapsed_ms)
+        trace = self.trace
+        if trace is not None:
+            trace.depth -= 1
+            trace.spans.append((self.name, (self.start - trace.origin) * 1000, elapsed_ms, trace.depth))
+        return False
+
+
+def traced(name):
+    """Decorator form of ``span`` for a whole function."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class rerun_trace:
+    """
+    Collect the spans of one script run into a RerunTrace
+
+    Fragment reruns execute only the fragment, so fragments open their own
+    rerun_trace. When one is already active on this thread (the fragment is
+    rendering as part of a full rerun), the block is recorded as a span of
+    that trace instead.
+
+    Args:
+        history (collections.deque): Where the finished trace is appended,
+                                     typically a bounded deque in session state
+        label (str): Shown next to the trace, e.g. the page being rendered
+    """
+
+    def __init__(self, history, label=None):
+        self.history = history
+        self.trace = RerunTrace(label)
+        self.token = None
+        self.nested = None
+
+    def __enter__(self):
+        if TRACING_ENABLED:
+            if _current_trace.get() is not None:
+                self.nested = span(self.trace.label).__enter__()
+                return _current_trace.get()
+            self.token = _current_trace.set(self.trace)
+            self.trace.origin = time.perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        # Also runs for st.rerun() and st.stop(), which end the script with an exception
+        if self.nested is not None:
+            return self.nested.__exit__(*exc_info)
+        if self.token is None:
+            return False
+        _current_trace.reset(self.token)
+        elapsed_ms = (time.perf_counter() - self.trace.origin) * 1000
+        self.trace.total_ms = round(elapsed_ms, 3)
+        HISTOGRAM.record(RERUN_SPAN, elapsed_ms)
+        self.history.append(self.trace)
+        if PERF_TRACE_LOG:
+            line = json.dumps(self.trace.to_dict())
+            with _log_lock, open(PERF_TRACE_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return False
+
+
+def to_jsonl(records):
+    """Serialize RerunTraces or histogram rows as JSON lines."""
+    return "".join(
+        json.dumps(record.to_dict() if isinstance(record, RerunTrace) else record) + "\n"
+        for record in records
+    )
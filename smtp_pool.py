@@ -0,0 +1,147 @@
+"""
+Pooled, authenticated SMTP sessions.
+
+Opening an SMTP session costs a TCP connect, a STARTTLS handshake and an
+AUTH round-trip. The pool keeps a few sessions open, health-checks the
+ones that have sat idle, and sends whole batches of messages over a
+single session.
+"""
+import smtplib
+import threading
+import time
+
+# Close sessions idle for longer than this; most servers drop them after a few minutes
+SMTP_IDLE_TIMEOUT = 120
+# Sessions idle for longer than this get a NOOP before reuse
+SMTP_HEALTH_CHECK_SECONDS = 15
+
+
+class SMTPSessionPool:
+    """
+    Thread-safe pool of logged-in ``smtplib.SMTP`` sessions.
+
+    ``send_batch`` checks out one session and sends every message over it,
+    reconnecting once if the server drops the connection mid-batch.
+    """
+
+    def __init__(self, host, port, use_tls=True, username=None, password=None, timeout=30,
+                 max_sessions=2, idle_timeout=SMTP_IDLE_TIMEOUT, health_check_after=SMTP_HEALTH_CHECK_SECONDS):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self._idle = []  # (session, last_used) pairs, most recently used last
+        self._lock = threading.Lock()
+        self._available = threading.Semaphore(max_sessions)
+        self.stats = {"connects": 0, "messages": 0, "reconnects": 0}
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            self._quit(server)
+            raise
+        with self._lock:
+            self.stats["connects"] += 1
+        return server
+
+    @staticmethod
+    def _quit(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _healthy(self, server):
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self):
+        self._available.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    server, last_used = self._idle.pop()
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.idle_timeout:
+                    self._quit(server)
+                elif idle_for > self.health_check_after and not self._healthy(server):
+                    server.close()
+                else:
+                    return server
+            return self._connect()
+        except Exception:
+            self._available.release()
+            raise
+
+    def _release(self, server, healthy=True):
+        try:
+            if healthy:
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+            else:
+                server.close()
+        finally:
+            self._available.release()
+
+    def send_batch(self, messages):
+        """
+        Send email messages over one pooled session
+
+        Args:
+            messages (list): ``email.message.Message`` objects
+
+        Returns:
+            list: One entry per message, None if sent or the exception that rejected it
+        """
+        results = [None] * len(messages)
+        server = self._acquire()
+        healthy = True
+        try:
+            for i, msg in enumerate(messages):
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # Dropped session: reconnect once and retry this message
+                    server.close()
+                    with self._lock:
+                        self.stats["reconnects"] += 1
+                    try:
+                        server = self._connect()
+                        server.send_message(msg)
+                    except Exception as e:
+                        results[i:] = [e] * (len(messages) - i)
+                        healthy = False
+                        break
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    # Rejected message; the session itself is still usable
+                    results[i] = e
+                    continue
+                except Exception as e:
+                    results[i:] = [e] * (len(messages) - i)
+                    healthy = False
+                    break
+                with self._lock:
+                    self.stats["messages"] += 1
+        finally:
+            self._release(server, healthy)
+        return results
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
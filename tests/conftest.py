@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from appdir import app_workdir
+
+
+@pytest.fixture(scope="session")
+def app():
+    with app_workdir("onboard-test-"):
+        import onboard
+        yield onboard
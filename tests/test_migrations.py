@@ -0,0 +1,52 @@
+"""
+Upgrade checks for databases created before schema versioning.
+
+Migrations run on whatever connection they are handed, so they must not rely
+on the pool's sqlite3.Row factory.
+"""
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture()
+def baseline(app):
+    # A database as the unversioned app left it: original tables, user_version 0
+    connection = sqlite3.connect(":memory:", isolation_level=None)
+    app._migration_initial_schema(connection.cursor())
+    connection.executemany(
+        "INSERT INTO employees (id, name, email, position, start_date, employment_type, annual_salary, "
+        "offer_sent, offer_accepted, onboarding_completed, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, 'Full-time', ?, ?, ?, 0, '2024-03-01 10:00:00', '2024-03-01 10:00:00')",
+        [
+            ("e1", "Asha Rao", "asha@example.com", "Data Scientist", "April 01, 2024", "50,000", 1, 1),
+            ("e2", "Ravi Kumar", "ravi@example.com", "ML Engineer", "May 15, 2024", "45000", 1, 0),
+            ("e3", "Meera Iyer", "meera@example.com", "Intern", "June 03, 2024", None, 0, 0),
+        ]
+    )
+    connection.execute(
+        "INSERT INTO documents (id, name, category, role, file_path, upload_date) "
+        "VALUES ('d1', 'Ravi Kumar', 'offer_letter', 'ML Engineer', 'data/documents/Ravi_Kumar_20240301_offer_letter.pdf', '2024-03-01 10:00:00')"
+    )
+    yield connection
+    connection.close()
+
+
+def test_migrates_populated_baseline_on_plain_connection(app, baseline):
+    assert baseline.row_factory is None
+    
+    assert app.run_migrations(baseline) == app.MIGRATIONS[-1][0]
+    
+    rows = baseline.execute(
+        "SELECT id, start_date_iso, salary_monthly, salary_annual, status FROM employees ORDER BY id"
+    ).fetchall()
+    assert rows == [
+        ("e1", "2024-04-01", 50000, 600000, "Offer Accepted"),
+        ("e2", "2024-05-15", 45000, 540000, "Offer Sent"),
+        ("e3", "2024-06-03", None, None, "Offer Generated"),
+    ]
+    assert baseline.execute("SELECT total_offers, offers_sent, offers_accepted FROM employee_stats").fetchone() == (3, 2, 1)
+    assert baseline.execute("SELECT rowid FROM employees_fts WHERE employees_fts MATCH 'meera'").fetchall() == [
+        baseline.execute("SELECT rowid FROM employees WHERE id = 'e3'").fetchone()
+    ]
+    assert baseline.execute("SELECT employee_id FROM documents WHERE id = 'd1'").fetchone() == ("e2",)
@@ -0,0 +1,39 @@
+"""
+Query plan checks for the dashboard's keyset pagination.
+
+Every candidate sort option must page by seeking into its (sort key, id)
+index; a plan that scans the employees table or its index gets slower with
+every page the user clicks through.
+"""
+import sqlite3
+
+import pytest
+
+# Keys of onboard.CANDIDATE_SORT_OPTIONS; test_every_sort_option_is_covered keeps them in step
+SORT_OPTIONS = ["Name (A-Z)", "Name (Z-A)", "Status", "Start Date (Recent)", "Start Date (Oldest)"]
+
+
+@pytest.fixture()
+def conn(app):
+    connection = sqlite3.connect(":memory:", isolation_level=None)
+    app.run_migrations(connection)
+    yield connection
+    connection.close()
+
+
+def query_plan(conn, query, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params + [26])]
+
+
+def test_every_sort_option_is_covered(app):
+    assert sorted(app.CANDIDATE_SORT_OPTIONS) == sorted(SORT_OPTIONS)
+
+
+@pytest.mark.parametrize("sort_option", SORT_OPTIONS)
+def test_next_page_seeks_sort_index(app, conn, sort_option):
+    query, params = app.candidate_page_query(sort_option=sort_option, after=("m", "7f3c"))
+    plan = query_plan(conn, query, params)
+    assert any(step.startswith("SEARCH employees USING INDEX") for step in plan), plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+